@@ -0,0 +1,63 @@
+"""Per-commit line totals by chart category, shared by the evolution charts."""
+
+from typing import cast
+
+import pandas as pd
+
+CATEGORY_CODE_COMMENTS = "Code Comments"
+CATEGORY_SOURCE_CODE = "Source Code"
+CATEGORY_TEST_CODE = "Test Code"
+CATEGORY_UNCATEGORISED = "UNCATEGORISED_DIR"
+
+# Chart category for code lines in each scanned directory
+_CODE_CATEGORIES = {"src": CATEGORY_SOURCE_CODE, "tests": CATEGORY_TEST_CODE}
+
+
+def commit_category_totals(df_per_file: pd.DataFrame) -> pd.DataFrame:
+    """Sum line counts per commit and chart category.
+
+    Input: One row per file per commit (includes filedir column).
+
+    Process:
+    1. Sum code_lines and documentation_lines per commit and filedir, in one
+       groupby straight off the input (no copy, no melt of the per-file rows)
+    2. Categorise the (few) summed rows:
+       - documentation_lines → "Code Comments"
+       - code_lines + src → "Source Code"
+       - code_lines + tests → "Test Code"
+       - code_lines + other → "UNCATEGORISED_DIR" (fail-loud)
+    3. Sum again per commit and category
+
+    Commits are keyed by commit_date and, when present, commit_id, so commits
+    sharing a timestamp stay apart.
+
+    Returns:
+        DataFrame with the commit key columns plus category and line_count
+        (one row per commit/category)
+    """
+    commit_keys = [key for key in ("commit_date", "commit_id") if key in df_per_file]
+    per_dir = (
+        df_per_file.groupby([*commit_keys, "filedir"], observed=True, sort=False)[
+            ["code_lines", "documentation_lines"]
+        ]
+        .sum()
+        .reset_index()
+    )
+
+    code = per_dir[commit_keys].assign(
+        category=per_dir["filedir"].map(
+            lambda filedir: _CODE_CATEGORIES.get(str(filedir), CATEGORY_UNCATEGORISED)
+        ),
+        line_count=per_dir["code_lines"],
+    )
+    comments = per_dir[commit_keys].assign(
+        category=CATEGORY_CODE_COMMENTS, line_count=per_dir["documentation_lines"]
+    )
+    result = (
+        pd.concat([code, comments], ignore_index=True)
+        .groupby([*commit_keys, "category"], as_index=False, observed=True, sort=False)[
+            "line_count"
+        ]
+        .sum()
+    )
+    return cast("pd.DataFrame", result)
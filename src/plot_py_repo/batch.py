@@ -0,0 +1,213 @@
+"""Analyse many repositories in one process with a shared worker pool."""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .classify_cache import ClassificationCache
+from .count_lines import POOL_CONTEXT
+from .git_history import OutputFormat, generate_csv
+from .pathspecs import DEFAULT_PATH_FILTER, PathFilter
+from .sampling import NO_SAMPLING, Sampling
+
+if TYPE_CHECKING:
+    from .theme_plotly import ChartExporter
+
+
+def read_repo_list(list_file: Path) -> list[str]:
+    """Read repository paths from list_file, one per line.
+
+    Blank lines and lines starting with "#" are skipped. Relative paths are
+    resolved against the list file's directory.
+
+    Raises:
+        FileNotFoundError: If list_file does not exist
+    """
+    repo_paths = []
+    for line in list_file.read_text(encoding="utf-8").splitlines():
+        entry = line.strip()
+        if entry and not entry.startswith("#"):
+            repo_paths.append(str((list_file.parent / entry).resolve()))
+    return repo_paths
+
+
+def _repo_output_dirs(repo_paths: list[str], output_dir: Path) -> list[Path]:
+    """Name each repo's output directory after the repo, suffixing repeated names."""
+    seen: dict[str, int] = {}
+    output_dirs = []
+    for repo_path in repo_paths:
+        name = Path(repo_path).name
+        seen[name] = seen.get(name, 0) + 1
+        suffix = f"-{seen[name]}" if seen[name] > 1 else ""
+        output_dirs.append(output_dir / f"{name}{suffix}")
+    return output_dirs
+
+
+def _combine_history_files(
+    history_files: list[str], combined_file: Path, output_format: OutputFormat
+) -> None:
+    """Concatenate per-repo history files (same columns) into combined_file.
+
+    Files are appended as they are read, so only one batch of rows is in memory.
+    """
+    if output_format == "csv":
+        with combined_file.open("w", encoding="utf-8") as combined:
+            for index, history_file in enumerate(history_files):
+                with Path(history_file).open(encoding="utf-8") as f:
+                    header = f.readline()
+                    if index == 0:
+                        combined.write(header)
+                    combined.writelines(f)
+        return
+
+    from . import columnar  # noqa: PLC0415 (loads pyarrow only for typed output)
+
+    columnar.combine_histories(
+        [Path(history_file) for history_file in history_files],
+        combined_file,
+        output_format,
+    )
+
+
+def _chart_exporter(*, charts: bool) -> AbstractContextManager["ChartExporter | None"]:
+    """Start a chart exporter, or nothing without charts.
+
+    Plotly and Kaleido are imported here, so runs without charts never load them.
+    """
+    if not charts:
+        return nullcontext()
+    from .theme_plotly import ChartExporter  # noqa: PLC0415 (heavy, charts only)
+
+    return ChartExporter()
+
+
+def _create_charts(
+    history_file: str, repo_output_dir: Path, exporter: "ChartExporter"
+) -> bool:
+    """Submit a repository's charts to the shared exporter, reporting failure.
+
+    Returns:
+        Whether the charts were built and submitted
+    """
+    from .visualise import create_charts  # noqa: PLC0415 (as _chart_exporter)
+
+    try:
+        create_charts(history_file, str(repo_output_dir), exporter)
+    except SystemExit:
+        # create_charts has already printed why
+        return False
+    except Exception as e:  # noqa: BLE001 (reported; the other repositories still run)
+        print(f"❌  Could not chart {history_file}: {e}")
+        return False
+    return True
+
+
+def _finish_charts(exporter: "ChartExporter | None") -> bool:
+    """Wait for the shared exporter to write every chart, reporting failure.
+
+    Returns:
+        Whether every submitted chart was written
+    """
+    if exporter is None:
+        return True
+    try:
+        exporter.close()
+    except Exception as e:  # noqa: BLE001 (reported; the histories are written)
+        print(f"❌  Could not write the charts: {e}")
+        return False
+    return True
+
+
+def run_batch(  # noqa: PLR0913 (mirrors the CLI options)
+    repo_paths: list[str],
+    output_dir: str,
+    jobs: int = 1,
+    output_format: OutputFormat = "csv",
+    cache: ClassificationCache | None = None,
+    *,
+    charts: bool = True,
+    sampling: Sampling = NO_SAMPLING,
+    git_concurrency: int = 1,
+    path_filter: PathFilter = DEFAULT_PATH_FILTER,
+) -> list[str]:
+    """Analyse every repository, sharing one worker pool and one chart browser.
+
+    Each repository gets its own subdirectory of output_dir with its history
+    file, history store and charts. All histories are also combined into
+    output_dir/combined_history.<format>. A repository whose analysis or
+    charts fail (not a Git repo, no Python files, any error) is reported and
+    the rest still run.
+
+    Args:
+        repo_paths: Paths to Git repositories
+        output_dir: Directory for per-repo subdirectories and the combined file
+        jobs: Number of worker processes shared by all repositories (1 = serial)
+        output_format: "csv", "parquet" or "feather", as for generate_csv
+        cache: Classification cache shared by all repositories, as for generate_csv
+        charts: Whether to create each repository's charts
+        sampling: (every, per, max_commits) applied to each repository, as for
+            generate_csv
+        git_concurrency: Git processes run at once per repository, as for
+            generate_csv
+        path_filter: (include, exclude) globs applied to each repository, as
+            for generate_csv
+
+    Returns:
+        Repository paths that failed
+    """
+    output_path = Path(output_dir)
+    history_files: list[str] = []
+    charted: list[str] = []
+    failed: list[str] = []
+
+    with (
+        ProcessPoolExecutor(jobs, mp_context=POOL_CONTEXT)
+        if jobs > 1
+        else nullcontext() as executor,
+        _chart_exporter(charts=charts) as exporter,
+    ):
+        for repo_path, repo_output_dir in zip(
+            repo_paths, _repo_output_dirs(repo_paths, output_path), strict=True
+        ):
+            try:
+                repo_output_dir.mkdir(parents=True, exist_ok=True)
+                history_file = generate_csv(
+                    repo_path,
+                    str(repo_output_dir),
+                    output_format=output_format,
+                    executor=executor,
+                    sampling=sampling,
+                    git_concurrency=git_concurrency,
+                    cache=cache,
+                    path_filter=path_filter,
+                )
+            except SystemExit:
+                # generate_csv has already printed why; carry on with the rest
+                failed.append(repo_path)
+                continue
+            except Exception as e:  # noqa: BLE001 (as in _create_charts)
+                print(f"❌  Could not analyse {repo_path}: {e}")
+                failed.append(repo_path)
+                continue
+            history_files.append(history_file)
+            if exporter is not None:
+                if _create_charts(history_file, repo_output_dir, exporter):
+                    charted.append(repo_path)
+                else:
+                    failed.append(repo_path)
+
+        # Combined while charts may still be rendering in the background
+        if history_files:
+            combined_file = output_path / f"combined_history.{output_format}"
+            _combine_history_files(history_files, combined_file, output_format)
+            print(f"✅  Combined {len(history_files)} repositories into {combined_file}")
+
+        if not _finish_charts(exporter):
+            failed += charted
+
+    if failed:
+        print(f"❌  {len(failed)} of {len(repo_paths)} repositories failed:")
+        for repo_path in failed:
+            print(f"    • {repo_path}")
+    return failed
@@ -0,0 +1,228 @@
+"""Benchmarks for the Git traversal, classification and charting pipeline."""
+
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from importlib.metadata import version
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+
+from . import profiling
+from .git_history import generate_csv
+
+# Default synthetic repository sizes as (commits, files, lines per file)
+DEFAULT_SIZES = [(50, 10, 100), (500, 50, 200)]
+
+# Share of files changed by each commit after the first
+_CHANGED_FILES_SHARE = 0.1
+
+# Reported stages, each the sum of the profiling stages recorded under it
+_STAGES = {
+    "log": ["git.log"],
+    "tree_walk": ["git.log_raw", "git.diff_tree"],
+    "blob_read": ["git.blob_read"],
+    "classify": ["classify"],
+    "csv_write": ["csv.write"],
+}
+
+
+def parse_size(size: str) -> tuple[int, int, int]:
+    """Parse "COMMITSxFILESxLINES" (e.g. "500x50x200") into a tuple of ints.
+
+    Raises:
+        ValueError: If size is not three positive integers separated by "x"
+    """
+    msg = f"Expected COMMITSxFILESxLINES with positive integers, got {size!r}"
+    try:
+        commits, files, lines = (int(part) for part in size.lower().split("x"))
+    except ValueError as e:
+        raise ValueError(msg) from e
+    if min(commits, files, lines) < 1:
+        raise ValueError(msg)
+    return commits, files, lines
+
+
+def _synthetic_module(rng: random.Random, lines: int) -> bytes:
+    """Generate a Python module of exactly `lines` lines mixing all line types."""
+    body = [f'"""Synthetic module {rng.randrange(10**6)}."""', ""]
+    function_index = 0
+    while len(body) < lines:
+        body += [
+            f"# Helper {function_index}",
+            f"def function_{function_index}(value: int) -> int:",
+            f'    """Return value offset by {function_index}."""',
+            f"    result = value + {rng.randrange(1000)}  # inline comment",
+            "    return result",
+            "",
+        ]
+        function_index += 1
+    return ("\n".join(body[:lines]) + "\n").encode()
+
+
+def build_synthetic_repo(repo_path: Path, commits: int, files: int, lines: int) -> None:
+    """Create a Git repo with `commits` commits over `files` Python files.
+
+    Half the files live in src/, half in tests/. The first commit adds every file;
+    each later commit rewrites about a tenth of them. Built with one
+    `git fast-import` stream so large histories are quick to create.
+    """
+    rng = random.Random(f"{commits}x{files}x{lines}")  # noqa: S311 (not crypto)
+    paths = [
+        f"src/pkg/module_{i}.py" if i % 2 == 0 else f"tests/test_module_{i}.py"
+        for i in range(files)
+    ]
+    changed_per_commit = max(1, int(files * _CHANGED_FILES_SHARE))
+
+    stream = bytearray()
+    for commit_index in range(commits):
+        changed = paths if commit_index == 0 else rng.sample(paths, changed_per_commit)
+        message = f"Commit {commit_index}".encode()
+        timestamp = 1_700_000_000 + commit_index * 3600
+        stream += b"commit refs/heads/main\n"
+        stream += f"committer Bench <bench@example.com> {timestamp} +0000\n".encode()
+        stream += b"data %d\n%s\n" % (len(message), message)
+        for path in changed:
+            content = _synthetic_module(rng, lines)
+            stream += f"M 100644 inline {path}\n".encode()
+            stream += b"data %d\n%s\n" % (len(content), content)
+
+    repo_path.mkdir(parents=True)
+    subprocess.run(
+        ["/usr/bin/git", "init", "-q", "-b", "main"], cwd=repo_path, check=True
+    )
+    subprocess.run(
+        ["/usr/bin/git", "fast-import", "--quiet"],
+        cwd=repo_path,
+        input=bytes(stream),
+        check=True,
+    )
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process plus its waited-for children, in MB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max(own, children) / scale, 1)
+
+
+def _time_stages(repo_path: str, work_dir: Path, jobs: int, *, charts: bool) -> dict:
+    """Time the end-to-end analysis, and each stage within it from its profile.
+
+    Stages are timed within the one generate_csv run (see _STAGES), so they
+    are measured as the pipeline runs them, overlapping where it overlaps them.
+    """
+    profiling.enable()
+    try:
+        start = perf_counter()
+        with redirect_stdout(StringIO()):
+            csv_path = generate_csv(repo_path, str(work_dir), jobs=jobs)
+        generate_sec = perf_counter() - start
+        recorded = profiling.stage_seconds()
+        unique_blobs = profiling.counters().get("blob_cache.misses", 0)
+    finally:
+        profiling.disable()
+
+    stages = {
+        name: sum(recorded.get(recorded_name, 0.0) for recorded_name in recorded_names)
+        for name, recorded_names in _STAGES.items()
+    }
+    stages["generate_csv"] = generate_sec
+    with Path(csv_path).open(encoding="utf-8") as csv_file:
+        rows = sum(1 for _ in csv_file) - 1  # Header excluded
+
+    if charts:
+        from .visualise import create_charts  # noqa: PLC0415 (loads Plotly only here)
+
+        start = perf_counter()
+        with redirect_stdout(StringIO()):
+            create_charts(csv_path, str(work_dir))
+        stages["chart_render"] = perf_counter() - start
+
+    return {
+        "stages_sec": {name: round(seconds, 4) for name, seconds in stages.items()},
+        "rows": rows,
+        "unique_blobs": unique_blobs,
+        "rows_per_sec": round(rows / generate_sec),
+    }
+
+
+def run_case(size: tuple[int, int, int], jobs: int, *, charts: bool) -> dict:
+    """Build one synthetic repo and benchmark the pipeline against it."""
+    commits, files, lines = size
+    with tempfile.TemporaryDirectory(prefix="plot-py-repo-bench-") as tmp:
+        repo_path = Path(tmp) / f"repo_{commits}x{files}x{lines}"
+        work_dir = Path(tmp) / "output"
+        work_dir.mkdir()
+
+        start = perf_counter()
+        build_synthetic_repo(repo_path, commits, files, lines)
+        build_sec = perf_counter() - start
+
+        result = _time_stages(str(repo_path), work_dir, jobs, charts=charts)
+
+    return {
+        "commits": commits,
+        "files": files,
+        "lines": lines,
+        "build_sec": round(build_sec, 4),
+        **result,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(
+    sizes: list[tuple[int, int, int]], jobs: int = 1, *, charts: bool = True
+) -> dict:
+    """Benchmark every size, each in a fresh process so peak RSS is per case.
+
+    Returns:
+        JSON-serialisable results with environment details and one entry per size
+    """
+    spawn = multiprocessing.get_context("spawn")
+    cases = []
+    for size in sizes:
+        print(f"⏱️  Benchmarking {size[0]} commits x {size[1]} files x {size[2]} lines")
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as isolated:
+            cases.append(isolated.submit(run_case, size, jobs, charts=charts).result())
+    return {
+        "plot_py_repo_version": version("plot-py-repo"),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "jobs": jobs,
+        "cases": cases,
+    }
+
+
+def format_summary(results: dict) -> str:
+    """Render benchmark results as a plain-text table, one row per case."""
+    stage_names = list(results["cases"][0]["stages_sec"]) if results["cases"] else []
+    header = ["size", *stage_names, "rows/sec", "peak MB"]
+    rows = [
+        [
+            f"{case['commits']}x{case['files']}x{case['lines']}",
+            *(f"{case['stages_sec'][name]:.3f}" for name in stage_names),
+            f"{case['rows_per_sec']:,}",
+            f"{case['peak_rss_mb']:.1f}",
+        ]
+        for case in results["cases"]
+    ]
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths, strict=True))
+        for row in [header, *rows]
+    )
+
+
+def write_results(results: dict, output_file: Path) -> None:
+    """Write benchmark results as indented JSON."""
+    output_file.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
@@ -5,7 +5,9 @@ from typing import cast
 
 import pandas as pd
 import plotly.express as px
+from plotly.graph_objects import Figure
 
+from . import profiling
 from .theme_plotly import add_footnote_annotation, apply_common_layout, save_chart_image
 
 CHART_TITLE = "Repository Breakdown by File"
@@ -18,10 +20,21 @@ def create(df: pd.DataFrame, output_path: Path) -> None:
         df: DataFrame with commit history data
         output_path: Path where WebP image should be saved
     """
-    df_prepared = _prepare_data(df)
+    save_chart_image(build(df), output_path)
+
+
+def build(df: pd.DataFrame) -> Figure:
+    """Build the horizontal bar chart figure without exporting it.
+
+    Args:
+        df: DataFrame with commit history data
+    """
+    with profiling.stage("chart_breakdown.prepare"):
+        df_prepared = _prepare_data(df)
     latest_commit_date = cast("pd.Timestamp", df["commit_date"].max())
     repo_name = df["repo_name"].iloc[0]
-    _plot_and_save(df_prepared, latest_commit_date, output_path, repo_name)
+    with profiling.stage("chart_breakdown.plot"):
+        return _plot(df_prepared, latest_commit_date, repo_name)
 
 
 def _prepare_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -34,13 +47,12 @@ def _prepare_data(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def _plot_and_save(
+def _plot(
     df_prepared: pd.DataFrame,
     latest_commit_date: pd.Timestamp,
-    output_path: Path,
     repo_name: str,
-) -> None:
-    """Generate horizontal bar chart and write WebP image to output_path."""
+) -> Figure:
+    """Generate horizontal bar chart figure with theme and footnote applied."""
     fig = px.bar(
         df_prepared,
         y="filename",
@@ -57,4 +69,4 @@ def _plot_and_save(
     add_footnote_annotation(
         fig, repository_name=repo_name, latest_commit_date=latest_commit_date
     )
-    save_chart_image(fig, output_path)
+    return fig
@@ -0,0 +1,195 @@
+"""Persistent, size-bounded cache of line counts shared by every repository."""
+
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from . import profiling
+from .count_lines import CLASSIFIER_VERSION
+
+# Per-blob line counts: (docstring, comment, code, total)
+type LineCounts = tuple[int, int, int, int]
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "plot-py-repo"
+)
+DEFAULT_MAX_MB = 256
+
+_CACHE_FILE = "classifications.sqlite"
+
+# Bytes per megabyte for --cache-max-mb
+_BYTES_PER_MB = 1024 * 1024
+
+# Share of the size limit eviction shrinks to, so it does not run on every write
+_EVICT_TO_SHARE = 0.9
+
+# Seconds to wait for another process holding the cache's write lock
+_LOCK_TIMEOUT_SECONDS = 30
+
+_SCHEMA = """
+PRAGMA auto_vacuum = INCREMENTAL;
+CREATE TABLE IF NOT EXISTS blobs (
+    blob_sha TEXT PRIMARY KEY,
+    docstring_lines INTEGER NOT NULL,
+    comment_lines INTEGER NOT NULL,
+    code_lines INTEGER NOT NULL,
+    total_lines INTEGER NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_by_last_used ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ClassificationCache:
+    """SQLite cache of LineCounts by Git blob SHA, evicting least recently used.
+
+    A blob SHA is a hash of the file's content, so identical files in any
+    repository, fork or run share one entry and are classified only once. Once
+    the cache outgrows max_mb, the least recently used entries are deleted and
+    the file shrinks back. Entries classified by another CLASSIFIER_VERSION are
+    deleted on opening, so they are never returned. A cache may be shared by
+    threads, e.g. looked up by a reader thread while the main thread adds to it.
+
+        with ClassificationCache(DEFAULT_CACHE_DIR, DEFAULT_MAX_MB) as cache:
+            known = cache.get_many(blob_shas)
+            cache.put_many(new_line_counts)
+    """
+
+    def __init__(self, cache_dir: Path, max_mb: int) -> None:
+        """Open (or create) the cache in cache_dir, bounded to max_mb megabytes."""
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_mb * _BYTES_PER_MB
+        # Serialises the threads sharing the connection
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            cache_dir / _CACHE_FILE,
+            timeout=_LOCK_TIMEOUT_SECONDS,
+            check_same_thread=False,
+        )
+        self._connection.executescript(_SCHEMA)
+        self._use_version(CLASSIFIER_VERSION)
+
+    def __enter__(self) -> Self:
+        """Return the cache for use in a with block."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the database on leaving the with block."""
+        self.close()
+
+    def _use_version(self, version: str) -> None:
+        """Delete every entry if they were classified by another classifier version.
+
+        Caches from before versions were recorded are emptied too.
+        """
+        row = self._connection.execute(
+            "SELECT value FROM settings WHERE name = 'classifier_version'"
+        ).fetchone()
+        if row is not None and row[0] == version:
+            return
+        with self._connection:
+            self._connection.execute("DELETE FROM blobs")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO settings VALUES ('classifier_version', ?)",
+                (version,),
+            )
+        self._connection.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def get_many(self, blob_shas: Iterable[str]) -> dict[str, LineCounts]:
+        """Return cached LineCounts for those of blob_shas in the cache.
+
+        Entries found are marked as used now, keeping them from eviction.
+        """
+        with profiling.stage("classify_cache.read"), self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS wanted (blob_sha TEXT PRIMARY KEY)"
+            )
+            self._connection.execute("DELETE FROM wanted")
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO wanted VALUES (?)",
+                ((blob_sha,) for blob_sha in blob_shas),
+            )
+            found = {
+                blob_sha: (docstring_lines, comment_lines, code_lines, total_lines)
+                for (
+                    blob_sha,
+                    docstring_lines,
+                    comment_lines,
+                    code_lines,
+                    total_lines,
+                ) in self._connection.execute(
+                    "SELECT blobs.blob_sha, docstring_lines, comment_lines, code_lines, "
+                    "total_lines FROM wanted "
+                    "JOIN blobs ON blobs.blob_sha = wanted.blob_sha"
+                )
+            }
+            self._connection.execute(
+                "UPDATE blobs SET last_used = ? "
+                "WHERE blob_sha IN (SELECT blob_sha FROM wanted)",
+                (time.time_ns(),),
+            )
+        return found
+
+    def put_many(self, line_counts: dict[str, LineCounts]) -> None:
+        """Add LineCounts by blob SHA, then evict down to size if over max_mb."""
+        if not line_counts:
+            return
+        now = time.time_ns()
+        with self._lock:
+            with profiling.stage("classify_cache.write"), self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (blob_sha, *counts, now)
+                        for blob_sha, counts in line_counts.items()
+                    ],
+                )
+            self._evict_if_full()
+
+    def _used_bytes(self) -> int:
+        """Return the bytes of database pages in use (free pages excluded)."""
+        page_count, free_count, page_size = (
+            self._connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ("page_count", "freelist_count", "page_size")
+        )
+        return (page_count - free_count) * page_size
+
+    def _evict_if_full(self) -> None:
+        """Delete least recently used entries until within the size limit."""
+        used_bytes = self._used_bytes()
+        if used_bytes <= self._max_bytes:
+            return
+        (entry_count,) = self._connection.execute("SELECT COUNT(*) FROM blobs").fetchone()
+        keep_count = int(entry_count * self._max_bytes * _EVICT_TO_SHARE / used_bytes)
+        with self._connection:
+            evicted = self._connection.execute(
+                "DELETE FROM blobs WHERE blob_sha NOT IN "
+                "(SELECT blob_sha FROM blobs ORDER BY last_used DESC LIMIT ?)",
+                (keep_count,),
+            ).rowcount
+        # Hand the freed pages back to the filesystem
+        self._connection.execute("PRAGMA incremental_vacuum").fetchall()
+        profiling.count("classify_cache.evictions", evicted)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+
+def clear_cache(cache_dir: Path) -> None:
+    """Delete the cache in cache_dir, if there is one."""
+    (cache_dir / _CACHE_FILE).unlink(missing_ok=True)
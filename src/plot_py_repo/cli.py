@@ -1,13 +1,328 @@
 """Command-line interface for plot-py-repo."""
 
 import argparse
+import os
+import sys
+from contextlib import AbstractContextManager, nullcontext
+from importlib.util import find_spec
+from pathlib import Path
 
-from .git_history import generate_csv
-from .visualise import create_charts
+from . import profiling
+from .batch import read_repo_list, run_batch
+from .benchmark import (
+    DEFAULT_SIZES,
+    format_summary,
+    parse_size,
+    run_benchmarks,
+    write_results,
+)
+from .classify_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_MAX_MB,
+    ClassificationCache,
+    clear_cache,
+)
+from .git_history import OUTPUT_FORMATS, generate_csv
+from .pathspecs import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, PathFilter
+from .sampling import SAMPLING_PERIODS
+
+
+def _create_charts(history_path: str, output_dir: str) -> None:
+    """Create the charts, importing pandas, Plotly and Kaleido only now.
+
+    Keeps them out of --help, argument errors and --no-charts runs.
+    """
+    from .visualise import create_charts  # noqa: PLC0415 (heavy, charts only)
+
+    create_charts(history_path, output_dir)
+
+
+def _check_jobs_and_format(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> None:
+    """Exit with a usage error for invalid --jobs, or --format without pyarrow."""
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.format != "csv" and find_spec("pyarrow") is None:
+        parser.error(
+            f"--format {args.format} needs pyarrow: pip install 'plot-py-repo[arrow]'"
+        )
+
+
+def _check_include_globs(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> None:
+    """Exit with a usage error for --include globs that match non-Python files."""
+    for glob in args.include or ():
+        if not glob.endswith(".py"):
+            parser.error(f"--include {glob} must match Python files only (end in .py)")
+
+
+def _check_analysis_options(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> None:
+    """Exit with a usage error for out-of-range Git, sampling or filter options."""
+    if args.git_concurrency < 1:
+        parser.error("--git-concurrency must be at least 1")
+    if args.every < 1:
+        parser.error("--every must be at least 1")
+    if args.max_commits is not None and args.max_commits < 1:
+        parser.error("--max-commits must be at least 1")
+    _check_include_globs(parser, args)
+
+
+def _path_filter(args: argparse.Namespace) -> PathFilter:
+    """Return the (include, exclude) globs of --include and --exclude."""
+    return (
+        tuple(args.include or DEFAULT_INCLUDE),
+        tuple(args.exclude or DEFAULT_EXCLUDE),
+    )
+
+
+def _check_main_options(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> None:
+    """Exit with a usage error for conflicting or out-of-range main options."""
+    # Validate: repo_path and --csv are mutually exclusive
+    if args.csv and args.repo_path != ".":
+        parser.error("Cannot specify both repo_path and --csv")
+    if args.csv and args.no_charts:
+        parser.error("Cannot specify both --csv and --no-charts")
+    _check_jobs_and_format(parser, args)
+    _check_analysis_options(parser, args)
+
+
+def _add_analysis_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the Git, sampling and file-filter options shared by main and batch."""
+    parser.add_argument(
+        "--git-concurrency",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Run up to N Git processes at once, overlapping waits on slow "
+        "(network) filesystems (default: 1)",
+    )
+    parser.add_argument(
+        "--every",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Analyse every Nth commit, always including the latest (default: 1)",
+    )
+    parser.add_argument(
+        "--per",
+        choices=SAMPLING_PERIODS,
+        help="Analyse only the latest commit per day, week or month",
+    )
+    parser.add_argument(
+        "--max-commits",
+        metavar="K",
+        type=int,
+        help="Analyse at most K evenly spaced commits, always including the latest",
+    )
+    parser.add_argument(
+        "--include",
+        metavar="GLOB",
+        action="append",
+        help="Analyse only Python files matching GLOB (Git glob: ** spans "
+        f"directories); repeatable (default: {' '.join(DEFAULT_INCLUDE)})",
+    )
+    parser.add_argument(
+        "--exclude",
+        metavar="GLOB",
+        action="append",
+        help="Skip files matching GLOB, even if included; repeatable "
+        f"(default: {' '.join(DEFAULT_EXCLUDE)})",
+    )
+
+
+def _add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the classification cache options shared by main and batch."""
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Classification cache shared by all repositories and runs "
+        "(default: ~/.cache/plot-py-repo)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        metavar="MB",
+        type=int,
+        default=DEFAULT_MAX_MB,
+        help="Evict least recently used cache entries beyond MB megabytes; "
+        f"0 disables the cache (default: {DEFAULT_MAX_MB})",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Empty the classification cache before running",
+    )
+
+
+def _prepare_cache(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Validate the cache options and clear the cache if asked to."""
+    if args.cache_max_mb < 0:
+        parser.error("--cache-max-mb must be at least 0")
+    if args.clear_cache:
+        clear_cache(args.cache_dir)
+        print(f"✅  Cleared classification cache in {args.cache_dir}")
+
+
+def _open_cache(
+    args: argparse.Namespace,
+) -> AbstractContextManager[ClassificationCache | None]:
+    """Open the classification cache, or nothing if --cache-max-mb is 0."""
+    if args.cache_max_mb == 0:
+        return nullcontext()
+    return ClassificationCache(args.cache_dir, args.cache_max_mb)
+
+
+def bench(argv: list[str]) -> None:
+    """Entry point for `plot-py-repo bench`: benchmark the pipeline, write JSON."""
+    parser = argparse.ArgumentParser(
+        prog="plot-py-repo bench",
+        description="""⏱️  Benchmark plot-py-repo on synthetic Git repositories.
+
+Builds repos of each size, times every pipeline stage (git log, tree walk,
+blob read, classify, CSV write, chart render) and records peak memory and
+rows/sec as JSON for comparing versions.
+ """,
+        epilog="""examples:
+  plot-py-repo bench                             # Default sizes
+  plot-py-repo bench --sizes 2000x100x300        # COMMITSxFILESxLINES
+  plot-py-repo bench --no-charts --output a.json # Skip Kaleido, custom output""",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes",
+        metavar="SIZE",
+        nargs="+",
+        type=parse_size,
+        default=DEFAULT_SIZES,
+        help="Repo sizes as COMMITSxFILESxLINES (default: 50x10x100 500x50x200)",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        default="bench_results.json",
+        help="JSON results file (default: bench_results.json)",
+    )
+    parser.add_argument(
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Classify files in N parallel worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--no-charts",
+        action="store_true",
+        help="Skip the chart render stage",
+    )
+
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    results = run_benchmarks(args.sizes, jobs=args.jobs, charts=not args.no_charts)
+    write_results(results, Path(args.output))
+    print(format_summary(results))
+    print(f"✅  Wrote benchmark results to {args.output}")
+
+
+def batch(argv: list[str]) -> None:
+    """Entry point for `plot-py-repo batch`: analyse many repositories at once."""
+    parser = argparse.ArgumentParser(
+        prog="plot-py-repo batch",
+        description="""🦧 Analyse many Git repositories in one process.
+
+Reads repository paths (one per line, "#" comments allowed) and analyses them
+with one shared pool of classification workers. Writes each repository's
+history file and charts to its own subdirectory, plus one combined history
+file for all repositories.
+ """,
+        epilog="""examples:
+  plot-py-repo batch repos.txt                      # One CPU-wide worker pool
+  plot-py-repo batch repos.txt --output-dir reports # Save outputs to ./reports
+  plot-py-repo batch repos.txt --no-charts          # History files only
+  plot-py-repo batch repos.txt --per week           # Latest commit per week only""",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "repo_list",
+        metavar="REPOS_FILE",
+        help="Text file listing one repository path per line",
+    )
+    parser.add_argument(
+        "--output-dir",
+        metavar="DIR",
+        default=".",
+        help="Output directory for per-repo subdirectories and combined file "
+        "(default: current directory)",
+    )
+    parser.add_argument(
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Classify files in N worker processes shared by all repositories "
+        "(default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="History file format, as for plot-py-repo --format (default: csv)",
+    )
+    parser.add_argument(
+        "--no-charts",
+        action="store_true",
+        help="Skip creating each repository's charts",
+    )
+    _add_analysis_arguments(parser)
+    _add_cache_arguments(parser)
+
+    args = parser.parse_args(argv)
+    _check_jobs_and_format(parser, args)
+    _check_analysis_options(parser, args)
+    _prepare_cache(parser, args)
+
+    try:
+        repo_paths = read_repo_list(Path(args.repo_list))
+    except FileNotFoundError:
+        print(f"❌  Repository list not found: {args.repo_list}")
+        sys.exit(1)
+    if not repo_paths:
+        print(f"❌  No repositories listed in {args.repo_list}")
+        sys.exit(1)
+
+    with _open_cache(args) as cache:
+        failed = run_batch(
+            repo_paths,
+            args.output_dir,
+            jobs=args.jobs,
+            output_format=args.format,
+            cache=cache,
+            charts=not args.no_charts,
+            sampling=(args.every, args.per, args.max_commits),
+            git_concurrency=args.git_concurrency,
+            path_filter=_path_filter(args),
+        )
+    if failed:
+        sys.exit(1)
 
 
 def main() -> None:
     """Main entry point for plot-py-repo CLI."""
+    if sys.argv[1:2] == ["bench"]:
+        bench(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["batch"]:
+        batch(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         prog="plot-py-repo",
         description="""🦧 Visualise Python repository evolution through Git history.
@@ -21,7 +336,20 @@ Analyses Git commits to track code growth over time:
   plot-py-repo                           # Visualise current repo
   plot-py-repo /path/to/repo             # Visualise different repo
   plot-py-repo --csv history.csv         # Regenerate charts from CSV
-  plot-py-repo --output-dir ./reports    # Save outputs to ./reports""",
+  plot-py-repo --no-charts               # History file only (fast, e.g. hooks)
+  plot-py-repo --output-dir ./reports    # Save outputs to ./reports
+  plot-py-repo --jobs 8                  # Classify files on 8 CPU cores
+  plot-py-repo --format parquet          # Typed columnar history file
+  plot-py-repo --csv history.parquet     # Regenerate charts from Parquet
+  plot-py-repo --git-concurrency 8       # Overlap Git I/O on slow filesystems
+  plot-py-repo --per week                # Latest commit per week only
+  plot-py-repo --max-commits 500         # At most 500 evenly spaced commits
+  plot-py-repo --include 'pkg/**/*.py'   # Analyse only files matching globs
+  plot-py-repo --exclude '**/vendor/**'  # Skip files matching globs
+  plot-py-repo --clear-cache             # Reclassify every file from scratch
+  plot-py-repo --profile                 # Print per-stage timings, write trace
+  plot-py-repo batch --help              # Analyse many repos in one process
+  plot-py-repo bench --help              # Benchmark on synthetic repos""",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
@@ -34,7 +362,8 @@ Analyses Git commits to track code growth over time:
     parser.add_argument(
         "--csv",
         metavar="FILE",
-        help="Skip Git analysis, create visualisations from existing CSV",
+        help="Skip Git analysis, create visualisations from existing CSV "
+        "(or .parquet/.feather) history file",
     )
     parser.add_argument(
         "--output-dir",
@@ -42,18 +371,64 @@ Analyses Git commits to track code growth over time:
         default=".",
         help="Output directory for CSV and images (default: current directory)",
     )
+    parser.add_argument(
+        "--no-charts",
+        action="store_true",
+        help="Only write the history file; never loads the charting libraries",
+    )
+    parser.add_argument(
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Classify files in N parallel worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="History file format; parquet and feather are typed, faster to reload "
+        "and need pyarrow (default: csv)",
+    )
+    _add_analysis_arguments(parser)
+    _add_cache_arguments(parser)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage timings and counters, write profile_trace.json "
+        "(Chrome trace-event format) to the output directory",
+    )
 
     args = parser.parse_args()
 
-    # Validate: repo_path and --csv are mutually exclusive
-    if args.csv and args.repo_path != ".":
-        parser.error("Cannot specify both repo_path and --csv")
+    _check_main_options(parser, args)
+    _prepare_cache(parser, args)
+
+    if args.profile:
+        profiling.enable()
 
     # Execute workflow
     if args.csv:
         # Development mode: just visualise existing CSV
-        create_charts(args.csv, args.output_dir)
+        _create_charts(args.csv, args.output_dir)
     else:
         # Normal mode: generate CSV + visualise
-        csv_path = generate_csv(args.repo_path, args.output_dir)
-        create_charts(csv_path, args.output_dir)
+        with _open_cache(args) as cache:
+            history_path = generate_csv(
+                args.repo_path,
+                args.output_dir,
+                jobs=args.jobs,
+                output_format=args.format,
+                sampling=(args.every, args.per, args.max_commits),
+                git_concurrency=args.git_concurrency,
+                cache=cache,
+                path_filter=_path_filter(args),
+            )
+        if not args.no_charts:
+            _create_charts(history_path, args.output_dir)
+
+    if args.profile:
+        trace_path = Path(args.output_dir) / "profile_trace.json"
+        profiling.write_trace(trace_path)
+        print(f"\n{profiling.summary()}\n")
+        print(f"✅  Wrote profile trace to {trace_path}")
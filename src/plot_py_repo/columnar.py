@@ -0,0 +1,296 @@
+"""Typed Parquet/Feather history and summary files, streamed with pyarrow.
+
+Imported only when a columnar format is asked for, so CSV runs never load
+pyarrow.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import batched
+from pathlib import Path
+from typing import cast
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import ipc
+
+from . import profiling
+from .git_history import (
+    EXCLUDED_FILENAMES,
+    HISTORY_COLUMNS,
+    SUMMARY_COLUMNS,
+    OutputFormat,
+)
+from .history_store import HistoryStore
+
+# Rows per record batch (and Parquet row group): bounds memory however long the
+# history, since only one batch of store rows is held at a time
+_BATCH_ROWS = 10_000
+
+# Store row fields, in order, of HistoryStore.iter_export_rows and of
+# iter_export_summary (which has no filename)
+_HISTORY_ROW_FIELDS = [
+    "commit_id",
+    "commit_time",
+    "utc_offset",
+    "filedir",
+    "filename",
+    "code_lines",
+    "docstring_lines",
+    "comment_lines",
+    "total_lines",
+]
+_SUMMARY_ROW_FIELDS = [field for field in _HISTORY_ROW_FIELDS if field != "filename"]
+
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+_CATEGORY_COLUMNS = ("repo_name", "filedir", "filename")
+_LINE_COLUMNS = (
+    "code_lines",
+    "docstring_lines",
+    "comment_lines",
+    "total_lines",
+    "documentation_lines",
+)
+
+
+def commit_timezone(utc_offsets: Iterable[int]) -> str:
+    """Name the timezone commit dates with these UTC offsets (minutes) are stored in.
+
+    Keeps each commit's own UTC offset when the history uses a single offset;
+    mixed offsets (travel, daylight saving) stay in UTC, since one column can
+    only hold one timezone.
+    """
+    offsets = set(utc_offsets)
+    if len(offsets) != 1 or offsets == {0}:
+        return "UTC"
+    (offset,) = offsets
+    hours, minutes = divmod(abs(offset), 60)
+    return f"{'-' if offset < 0 else '+'}{hours:02d}:{minutes:02d}"
+
+
+def history_schema(columns: Sequence[str], timezone: str) -> pa.Schema:
+    """Return the schema of a typed history (or summary) file with these columns.
+
+    Types: dictionary-encoded repo_name, filedir and filename, int64 line counts,
+    string commit_id and a tz-aware nanosecond commit_date in timezone.
+    """
+    types = {
+        "commit_date": pa.timestamp("ns", tz=timezone),
+        "commit_id": pa.string(),
+        **dict.fromkeys(_CATEGORY_COLUMNS, _CATEGORY),
+        **dict.fromkeys(_LINE_COLUMNS, pa.int64()),
+    }
+    return pa.schema([(column, types[column]) for column in columns])
+
+
+class _DictionaryEncoder:
+    """Encode strings against one dictionary that only ever grows.
+
+    Each batch's dictionary extends the previous one, so IPC files can hold
+    them as dictionary deltas.
+    """
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+
+    def encode(self, values: Iterable[str]) -> pa.DictionaryArray:
+        """Return values as a dictionary array over every value seen so far."""
+        codes = self._codes
+        indices = [codes.setdefault(value, len(codes)) for value in values]
+        return self._with_dictionary(pa.array(indices, pa.int32()))
+
+    def encode_array(self, array: pa.Array) -> pa.DictionaryArray:
+        """Re-encode a string or dictionary array against the growing dictionary.
+
+        Only the array's distinct values are looked up, not every row.
+        """
+        if not pa.types.is_dictionary(array.type):
+            array = array.dictionary_encode()
+        array = cast("pa.DictionaryArray", array)
+        codes = self._codes
+        recode = pa.array(
+            [
+                codes.setdefault(value, len(codes))
+                for value in array.dictionary.to_pylist()
+            ],
+            pa.int32(),
+        )
+        return self._with_dictionary(recode.take(array.indices))
+
+    def _with_dictionary(self, indices: pa.Array) -> pa.DictionaryArray:
+        """Pair indices with every value seen so far."""
+        return pa.DictionaryArray.from_arrays(
+            indices, pa.array(list(self._codes), pa.string())
+        )
+
+
+def _record_batches(
+    rows: Iterable[tuple],
+    row_fields: list[str],
+    repo_name: str,
+    schema: pa.Schema,
+) -> Iterable[pa.RecordBatch]:
+    """Turn store rows into record batches of schema, _BATCH_ROWS rows at a time.
+
+    Adds repo_name and documentation_lines, and builds commit_date from the
+    commit_time and utc_offset fields (which are dropped). No date text is parsed.
+    """
+    encoders = {column: _DictionaryEncoder() for column in _CATEGORY_COLUMNS}
+    date_type = schema.field("commit_date").type
+    for batch_rows in batched(rows, _BATCH_ROWS, strict=False):
+        fields = dict(zip(row_fields, zip(*batch_rows, strict=True), strict=True))
+        commit_times = pa.array(fields["commit_time"], pa.timestamp("s", tz="UTC"))
+        arrays: dict[str, pa.Array] = {
+            "repo_name": encoders["repo_name"].encode([repo_name] * len(batch_rows)),
+            "commit_date": commit_times.cast(date_type),
+            "commit_id": pa.array(fields["commit_id"], pa.string()),
+        }
+        for column in ("filedir", "filename"):
+            if column in fields:
+                arrays[column] = encoders[column].encode(fields[column])
+        for column in _LINE_COLUMNS[:-1]:
+            arrays[column] = pa.array(fields[column], pa.int64())
+        arrays["documentation_lines"] = pa.array(
+            map(
+                sum, zip(fields["docstring_lines"], fields["comment_lines"], strict=True)
+            ),
+            pa.int64(),
+        )
+        yield pa.RecordBatch.from_arrays(
+            [arrays[name] for name in schema.names], schema=schema
+        )
+
+
+def open_writer(
+    output_file: Path, schema: pa.Schema, output_format: OutputFormat
+) -> pq.ParquetWriter | ipc.RecordBatchFileWriter:
+    """Open a Parquet writer, or a Feather one whose file readers can memory-map.
+
+    Feather is written uncompressed so readers can map the columns without
+    copying, with dictionaries growing by deltas from batch to batch.
+    """
+    if output_format == "parquet":
+        return pq.ParquetWriter(output_file, schema)
+    return ipc.new_file(
+        output_file, schema, options=ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    )
+
+
+def _write_rows(  # noqa: PLR0913 (row source, layout and destination)
+    output_file: Path,
+    rows: Iterable[tuple],
+    row_fields: list[str],
+    repo_name: str,
+    schema: pa.Schema,
+    output_format: OutputFormat,
+) -> int:
+    """Stream rows into output_file batch by batch, returning data rows."""
+    row_count = 0
+    with open_writer(output_file, schema, output_format) as writer:
+        for batch in _record_batches(rows, row_fields, repo_name, schema):
+            writer.write_batch(batch)
+            row_count += batch.num_rows
+    return row_count
+
+
+def write_history(
+    output_file: Path,
+    repo_name: str,
+    store: HistoryStore,
+    output_format: OutputFormat,
+) -> int:
+    """Write a typed Parquet or Feather history file, returning data rows.
+
+    Holds the same columns as the CSV, but typed as by history_schema.
+    """
+    with profiling.stage(f"{output_format}.write"):
+        schema = history_schema(
+            HISTORY_COLUMNS, commit_timezone(store.export_utc_offsets())
+        )
+        row_count = _write_rows(
+            output_file,
+            store.iter_export_rows(),
+            _HISTORY_ROW_FIELDS,
+            repo_name,
+            schema,
+            output_format,
+        )
+    profiling.add_bytes(f"{output_format}.write", output_file.stat().st_size)
+    return row_count
+
+
+def write_summary(
+    summary_file: Path,
+    repo_name: str,
+    store: HistoryStore,
+    output_format: OutputFormat,
+) -> None:
+    """Write the typed per-commit summary: line totals per filedir of each commit.
+
+    Files in EXCLUDED_FILENAMES are left out, as in the CSV summary.
+    """
+    with profiling.stage("summary.write"):
+        schema = history_schema(
+            SUMMARY_COLUMNS,
+            commit_timezone(store.export_utc_offsets(EXCLUDED_FILENAMES)),
+        )
+        _write_rows(
+            summary_file,
+            store.iter_export_summary(EXCLUDED_FILENAMES),
+            _SUMMARY_ROW_FIELDS,
+            repo_name,
+            schema,
+            output_format,
+        )
+    profiling.add_bytes("summary.write", summary_file.stat().st_size)
+
+
+def _read_schema(history_file: Path, output_format: OutputFormat) -> pa.Schema:
+    """Read a Parquet or Feather file's schema, without reading its data."""
+    if output_format == "parquet":
+        return pq.read_schema(history_file)
+    with pa.memory_map(str(history_file)) as source:
+        return ipc.open_file(source).schema
+
+
+def _iter_file_batches(
+    history_file: Path, output_format: OutputFormat
+) -> Iterator[pa.RecordBatch]:
+    """Yield a Parquet or Feather file's rows as record batches, one at a time."""
+    if output_format == "parquet":
+        yield from pq.ParquetFile(history_file).iter_batches(batch_size=_BATCH_ROWS)
+        return
+    with pa.memory_map(str(history_file)) as source:
+        reader = ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+
+
+def combine_histories(
+    history_files: list[Path], combined_file: Path, output_format: OutputFormat
+) -> None:
+    """Append typed history files, one batch at a time, into combined_file.
+
+    Every file is cast to one schema: categories are re-encoded against shared
+    dictionaries, and commit dates keep the files' timezone if they all share
+    one, else move to UTC (as for mixed offsets within one repository).
+    """
+    timezones = {
+        cast("pa.TimestampType", schema.field("commit_date").type).tz
+        for schema in (
+            _read_schema(history_file, output_format) for history_file in history_files
+        )
+    }
+    schema = history_schema(
+        HISTORY_COLUMNS, timezones.pop() if len(timezones) == 1 else "UTC"
+    )
+    encoders = {column: _DictionaryEncoder() for column in _CATEGORY_COLUMNS}
+    with open_writer(combined_file, schema, output_format) as writer:
+        for history_file in history_files:
+            for batch in _iter_file_batches(history_file, output_format):
+                arrays = [
+                    encoders[field.name].encode_array(batch.column(field.name))
+                    if field.name in encoders
+                    else batch.column(field.name).cast(field.type)
+                    for field in schema
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
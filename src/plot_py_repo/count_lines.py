@@ -2,8 +2,90 @@
 
 import ast
 import contextlib
+import multiprocessing
 import tokenize
-from io import StringIO
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Executor
+from functools import cache, partial
+from io import BytesIO, StringIO
+from typing import Literal, NamedTuple
+
+from . import profiling
+
+# Classification engines:
+#  "tokens" - single tokenize pass, docstrings found from statement position
+#  "ast"    - AST parse for docstrings plus a separate tokenize pass
+type Engine = Literal["tokens", "ast"]
+DEFAULT_ENGINE: Engine = "tokens"
+
+# Identifies the results classify_lines gives with DEFAULT_ENGINE. Bump the number
+# whenever they change, so results stored by earlier versions are recomputed
+CLASSIFIER_VERSION = f"{DEFAULT_ENGINE}-2"
+
+# Start method for classification pools: forking a process where pandas/pyarrow
+# have already started threads can deadlock the children
+POOL_CONTEXT = multiprocessing.get_context("forkserver")
+
+# Files per task sent to a worker: amortises pickling without starving workers
+_CHUNK_SIZE = 16
+
+# Line classes for the "tokens" engine, in priority order: each line takes the
+# highest class of any token touching it (a docstring beats code beats comment)
+_BLANK = 0
+_COMMENT = 1
+_CODE = 2
+_DOCSTRING = 3
+
+_STRUCTURAL_TOKENS = frozenset(
+    {
+        tokenize.INDENT,
+        tokenize.DEDENT,
+        tokenize.NL,
+        tokenize.NEWLINE,
+        tokenize.ENCODING,
+    }
+)
+
+# Tokens allowed between a def/class colon (or module start) and its first statement
+_BODY_PREAMBLE_TOKENS = frozenset(
+    {tokenize.NEWLINE, tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.ENCODING}
+)
+
+# Line boundaries str.splitlines() recognises besides "\n"
+_OTHER_LINE_BREAKS = "\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+class LineClassification(NamedTuple):
+    """Line counts of one Python file, by class.
+
+    code_lines includes blank_lines (blank lines count as code), so
+    docstring_lines + comment_lines + code_lines == total_lines.
+    """
+
+    docstring_lines: int
+    comment_lines: int
+    code_lines: int
+    blank_lines: int
+    total_lines: int
+
+
+_EMPTY = LineClassification(0, 0, 0, 0, 0)
+
+
+def _count_lines(content: str) -> int:
+    """Count lines as len(content.splitlines()) does, without building the list."""
+    if any(line_break in content for line_break in _OTHER_LINE_BREAKS):
+        return len(content.splitlines())
+    return content.count("\n") + (not content.endswith("\n"))
+
+
+def _decode_source(source: bytes) -> str:
+    """Decode source in its declared encoding (UTF-8 by default), dropping bad bytes."""
+    try:
+        encoding, _ = tokenize.detect_encoding(BytesIO(source).readline)
+    except SyntaxError:  # Unknown or inconsistent encoding declaration
+        encoding = "utf-8"
+    return source.decode(encoding, errors="ignore")
 
 
 def _extract_docstring_lines(content: str) -> set[int]:
@@ -43,7 +125,8 @@ def _extract_docstring_lines(content: str) -> set[int]:
 def _tokenize_content(content: str) -> list[tokenize.TokenInfo]:
     """Tokenise Python content, returning empty list on error."""
     tokens: list[tokenize.TokenInfo] = []
-    with contextlib.suppress(tokenize.TokenError):
+    # IndentationError (a SyntaxError) is raised for inconsistent dedents
+    with contextlib.suppress(tokenize.TokenError, SyntaxError):
         tokens = list(tokenize.generate_tokens(StringIO(content).readline))
     return tokens
 
@@ -88,24 +171,8 @@ def _mark_comment_lines(
                 line_classifications[start_row - 1] = "comment"
 
 
-def classify_lines(content: str) -> tuple[int, int, int]:
-    """Count lines in Python content, classifying each as docstring, comment, or code.
-
-    Blank lines are counted as code.
-
-    Args:
-        content: Python source code as string
-
-    Returns:
-        Tuple of (docstring_lines, comment_lines, code_lines) total counts
-    """
-    # Handle truly empty content (0 bytes)
-    if not content:
-        return (0, 0, 0)
-
-    if not content.endswith("\n"):
-        content += "\n"
-
+def _classify_lines_ast(content: str) -> LineClassification:
+    """Classify lines using an AST parse for docstrings and tokens for the rest."""
     lines = content.splitlines()
     total_lines = len(lines)
 
@@ -138,8 +205,268 @@ def classify_lines(content: str) -> tuple[int, int, int]:
             line_classifications[i] = "blank"
 
     # Count the categories (blanks are included in code count)
-    return (
+    blank_lines = line_classifications.count("blank")
+    return LineClassification(
         line_classifications.count("docstring"),
         line_classifications.count("comment"),
-        line_classifications.count("code") + line_classifications.count("blank"),
+        line_classifications.count("code") + blank_lines,
+        blank_lines,
+        total_lines,
+    )
+
+
+class _DocstringTracker:
+    """Spot docstrings in a token stream without building an AST.
+
+    A docstring is a statement made only of str literals (optionally in
+    parentheses) that opens the module or a def/class body, matching what
+    ast.get_docstring accepts.
+    """
+
+    def __init__(self) -> None:
+        self._depth = 0  # Bracket nesting level
+        self._in_header = False  # Between def/class keyword and its body colon
+        self._expecting = True  # Next statement opens a body (module start)
+        self._in_candidate = False  # Reading a statement that may be a docstring
+        self._strings: list[tokenize.TokenInfo] = []
+        self._parens_opened = 0
+        self._parens_closed = 0
+
+    def feed(self, tok: tokenize.TokenInfo) -> tuple[int, int] | None:
+        """Consume the next token.
+
+        Returns:
+            (start_row, end_row) of a docstring once its statement ends, else None
+        """
+        docstring_rows = None
+        if self._in_candidate:
+            docstring_rows = self._feed_candidate(tok)
+        elif self._expecting and tok.type not in _BODY_PREAMBLE_TOKENS:
+            self._expecting = False
+            self._in_candidate = True
+            self._strings = []
+            self._parens_opened = self._parens_closed = 0
+            docstring_rows = self._feed_candidate(tok)
+        self._track_header(tok)
+        return docstring_rows
+
+    def _feed_candidate(self, tok: tokenize.TokenInfo) -> tuple[int, int] | None:
+        """Advance through '('* STRING+ ')'* then the statement end."""
+        if tok.type in (tokenize.NL, tokenize.COMMENT):
+            return None
+        if tok.type == tokenize.STRING and not self._parens_closed:
+            prefix = tok.string[: tok.string.index(tok.string[-1])]
+            if "b" not in prefix.lower():  # Bytes literals are never docstrings
+                self._strings.append(tok)
+                return None
+        elif tok.string == "(" and not self._strings:
+            self._parens_opened += 1
+            return None
+        elif (
+            tok.string == ")"
+            and self._strings
+            and (self._parens_closed < self._parens_opened)
+        ):
+            self._parens_closed += 1
+            return None
+        elif (
+            (tok.type == tokenize.NEWLINE or tok.string == ";")
+            and self._strings
+            and self._parens_closed == self._parens_opened
+        ):
+            self._in_candidate = False
+            return self._strings[0].start[0], self._strings[-1].end[0]
+        self._in_candidate = False
+        return None
+
+    def _track_header(self, tok: tokenize.TokenInfo) -> None:
+        """Watch for the colon ending a def/class header, which opens its body."""
+        if tok.type == tokenize.NAME and tok.string in ("def", "class"):
+            self._in_header = True
+        elif tok.type == tokenize.OP:
+            if tok.string in "([{":
+                self._depth += 1
+            elif tok.string in ")]}":
+                self._depth -= 1
+            elif tok.string == ":" and self._in_header and self._depth == 0:
+                self._in_header = False
+                self._expecting = True
+
+
+def _mark_token(tok: tokenize.TokenInfo, line_classes: bytearray) -> None:
+    """Raise the class of each line a token touches (comments mark their start row)."""
+    if tok.type in _STRUCTURAL_TOKENS:
+        return
+    start_row, end_row = tok.start[0], tok.end[0]
+    if tok.type == tokenize.COMMENT:
+        line_class, end_row = _COMMENT, start_row
+    else:
+        line_class = _CODE
+    for row in range(start_row, min(end_row, len(line_classes) - 1) + 1):
+        line_classes[row] = max(line_classes[row], line_class)
+
+
+def _classify_tokens(
+    tokens: Iterator[tokenize.TokenInfo], total_lines: int
+) -> LineClassification:
+    """Classify lines from a single pass over tokens into a compact bytearray.
+
+    Raises:
+        tokenize.TokenError, SyntaxError: If the source fails to tokenise
+    """
+    # One byte per line, 1-based; the extra slot absorbs the ENDMARKER row
+    line_classes = bytearray(total_lines + 2)
+    docstrings = _DocstringTracker()
+    for tok in tokens:
+        _mark_token(tok, line_classes)
+        docstring_rows = docstrings.feed(tok)
+        if docstring_rows:
+            start_row, end_row = docstring_rows
+            for row in range(start_row, end_row + 1):
+                line_classes[row] = _DOCSTRING
+
+    counted = line_classes[1 : total_lines + 1]
+    blank_lines = counted.count(_BLANK)
+    return LineClassification(
+        counted.count(_DOCSTRING),
+        counted.count(_COMMENT),
+        counted.count(_CODE) + blank_lines,
+        blank_lines,
+        total_lines,
     )
+
+
+def _classify_lines_tokens(content: str) -> LineClassification:
+    """Classify lines with the "tokens" engine."""
+    total_lines = _count_lines(content)
+    try:
+        tokens = tokenize.generate_tokens(StringIO(content).readline)
+        return _classify_tokens(tokens, total_lines)
+    except (tokenize.TokenError, SyntaxError):
+        # Fallback: when tokenisation fails, every line counts as code
+        blank_lines = sum(not line.strip() for line in content.splitlines())
+        return LineClassification(0, 0, total_lines, blank_lines, total_lines)
+
+
+@cache
+def _other_line_break_bytes(encoding: str) -> tuple[bytes, ...]:
+    """Return _OTHER_LINE_BREAKS but CR as encoded in encoding, where it can be.
+
+    NEL is one byte in encodings such as latin-1, but two in UTF-8, whose lone
+    second byte is also part of many other characters (e.g. "Å").
+    """
+    codec = encoding.removesuffix("-sig")  # Encoding would prepend the BOM
+    encoded = []
+    for line_break in _OTHER_LINE_BREAKS.replace("\r", ""):
+        with contextlib.suppress(UnicodeEncodeError):
+            encoded.append(line_break.encode(codec))
+    return tuple(encoded)
+
+
+def _has_other_line_breaks(source: bytes) -> bool:
+    """Return whether source may hold line boundaries other than LF and CRLF.
+
+    Sources without any can be counted and tokenised as bytes. A CR only
+    counts when no LF follows it, so CRLF sources stay on the bytes path. The
+    other boundaries are looked for as encoded in source's declared encoding.
+    """
+    if source.count(b"\r") != source.count(b"\r\n"):
+        return True
+    try:
+        encoding, _ = tokenize.detect_encoding(BytesIO(source).readline)
+    except SyntaxError:  # The tokenizer would reject it too
+        return True
+    return any(line_break in source for line_break in _other_line_break_bytes(encoding))
+
+
+def _classify_bytes_tokens(source: bytes) -> LineClassification:
+    """Classify lines with the "tokens" engine, without decoding the whole source.
+
+    The tokenizer reads lines straight from source, decoding each as its
+    encoding declaration says.
+
+    Raises:
+        tokenize.TokenError, SyntaxError: If the source fails to tokenise,
+            including when it is not valid in its encoding
+    """
+    readline = BytesIO(source).readline
+    total_lines = source.count(b"\n")
+    if not source.endswith(b"\n"):
+        # Terminate the last line as it is read, rather than copying source
+        total_lines += 1
+        unterminated_readline = readline
+
+        def readline() -> bytes:
+            line = unterminated_readline()
+            return line if line.endswith(b"\n") or not line else line + b"\n"
+
+    return _classify_tokens(tokenize.tokenize(readline), total_lines)
+
+
+def classify_lines(
+    content: str | bytes, engine: Engine = DEFAULT_ENGINE
+) -> LineClassification:
+    """Count lines in Python content, classifying each as docstring, comment, or code.
+
+    Blank lines are counted as code, and also counted on their own. Every count,
+    total_lines included, comes from the one classification pass, so callers
+    need not scan content again.
+
+    Args:
+        content: Python source code, as text or as raw bytes (e.g. a Git blob).
+            Bytes are decoded as their encoding declaration says, UTF-8 by
+            default, with undecodable bytes dropped; the "tokens" engine
+            classifies most of them without decoding the whole file.
+        engine: "tokens" (single pass, default) or "ast" (AST + tokenize). They
+            agree on valid Python; for files that fail to parse, "ast" drops every
+            docstring while "tokens" still finds them.
+
+    Returns:
+        LineClassification of content's lines
+    """
+    if isinstance(content, bytes):
+        if not content:
+            return _EMPTY
+        if engine == "tokens" and not _has_other_line_breaks(content):
+            # Sources the tokenizer rejects (e.g. invalid UTF-8) are decoded leniently
+            with contextlib.suppress(tokenize.TokenError, SyntaxError):
+                return _classify_bytes_tokens(content)
+        content = _decode_source(content)
+
+    # Handle truly empty content (0 bytes)
+    if not content:
+        return _EMPTY
+
+    if not content.endswith("\n"):
+        content += "\n"
+
+    if engine == "ast":
+        return _classify_lines_ast(content)
+    return _classify_lines_tokens(content)
+
+
+def classify_many(
+    contents: Sequence[str | bytes],
+    executor: Executor | None = None,
+    engine: Engine = DEFAULT_ENGINE,
+) -> list[LineClassification]:
+    """Classify many Python files, in parallel when an executor is given.
+
+    Results are identical to calling classify_lines on each file in turn.
+
+    Args:
+        contents: Python source code, as for classify_lines
+        executor: Pool to spread work across (e.g. ProcessPoolExecutor using
+            POOL_CONTEXT), or None to classify serially in this process
+        engine: Classification engine, as for classify_lines
+
+    Returns:
+        List of LineClassification, in input order
+    """
+    classify = partial(classify_lines, engine=engine)
+    profiling.count("classify.files", len(contents))
+    profiling.add_bytes("classify", sum(len(content) for content in contents))
+    with profiling.stage("classify"):
+        if executor is None:
+            return [classify(content) for content in contents]
+        return list(executor.map(classify, contents, chunksize=_CHUNK_SIZE))
@@ -1,72 +1,859 @@
-"""Git history traversal and CSV generation."""
+"""Git history traversal and CSV (or Parquet/Feather) generation."""
 
+import asyncio
+import contextlib
 import subprocess
 import sys
+import threading
+from collections.abc import AsyncIterator, Container, Generator, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import batched, chain, islice
 from pathlib import Path
+from queue import Empty, Queue
+from typing import IO, Literal, cast
 
-from .count_lines import classify_lines
+from . import profiling
+from .classify_cache import ClassificationCache, LineCounts
+from .count_lines import CLASSIFIER_VERSION, POOL_CONTEXT, classify_many
+from .git_async import iterate, read_blobs, run_git
+from .git_blobs import BlobReader
+from .history_store import FileRow, HistoryStore
+from .pathspecs import DEFAULT_PATH_FILTER, PathFilter, filedir_of, to_pathspecs
+from .sampling import NO_SAMPLING, Sampling, sample_commits
+
+# Git file mode for a submodule (gitlink) entry in a tree
+_SUBMODULE_MODE = b"160000"
+
+# Git's empty tree, by hash length (SHA-1, SHA-256): diffing a commit against it
+# lists every file, and unlike ls-tree, diff-tree understands pathspec globs
+_EMPTY_TREES = {
+    40: "4b825dc642cb6eb9a060e54bf8d69288fbee4904",
+    64: "6ef19b41225c5369f1c104d45d8d85efa9b057b53b14b4b9b939dd74decc5321",
+}
+
+# New blobs (or commits) buffered before classifying them as one batch
+_CLASSIFY_BATCH_SIZE = 256
+
+# Batches the reader thread may queue ahead of classification (backpressure)
+_QUEUED_BATCHES = 4
+
+# Bytes read from the `git log` pipe at a time
+_READ_CHUNK_BYTES = 1 << 16
+
+# Buffer size for writing the CSV file
+_WRITE_BUFFER_BYTES = 1 << 20
+
+# Work for one classification batch:
+#  (every commit walked, in order, as (commit_hash, commit_time, utc_offset),
+#   new commits as (commit_hash, [(file_path, blob_sha), ...]),
+#   line counts found in the classification cache for blobs not seen in earlier
+#   batches, and the contents of the rest of those blobs, by blob SHA)
+type _Batch = tuple[
+    list[tuple[str, int, int]],
+    list[tuple[str, list[tuple[str, str]]]],
+    dict[str, LineCounts],
+    dict[str, bytes | None],
+]
+
+# A commit in the `git log --raw` pass: its hash, its first parent (None for a
+# root commit) and its (file_path, blob_sha) changes, as for _parse_diff_tree
+type _LoggedCommit = tuple[str, str | None, list[tuple[str, str | None]]]
+
+# History file formats; Parquet and Feather need the optional pyarrow dependency
+type OutputFormat = Literal["csv", "parquet", "feather"]
+OUTPUT_FORMATS: tuple[OutputFormat, ...] = ("csv", "parquet", "feather")
+
+# History file columns, in order
+HISTORY_COLUMNS = [
+    "repo_name",
+    "commit_date",
+    "commit_id",
+    "filedir",
+    "filename",
+    "code_lines",
+    "docstring_lines",
+    "comment_lines",
+    "total_lines",
+    "documentation_lines",
+]
+
+
+# Summary file columns, in order: HISTORY_COLUMNS totalled over each filedir
+SUMMARY_COLUMNS = [column for column in HISTORY_COLUMNS if column != "filename"]
+
+# Files left out of the summary and the charts (package markers would skew
+# per-file views); no longer analysed by default, but older history files and
+# custom --exclude globs may still hold them
+EXCLUDED_FILENAMES = ["__init__.py"]
 
 
 class GitError(Exception):
     """Raised when Git operations fail."""
 
 
-def get_commits(repo_path: str) -> list[tuple[str, str]]:
-    """Get list of (commit_hash, timestamp) from Git history (newest first).
+def _utc_offset_minutes(git_offset: str) -> int:
+    """Convert a Git "+ZZZZ" (hours and minutes) UTC offset into minutes."""
+    minutes = int(git_offset[1:3]) * 60 + int(git_offset[3:5])
+    return -minutes if git_offset.startswith("-") else minutes
+
+
+def _git_timestamp(commit_time: int, utc_offset: int) -> str:
+    """Format a commit's time as Git's default "YYYY-MM-DD HH:MM:SS +ZZZZ"."""
+    commit_timezone = timezone(timedelta(minutes=utc_offset))
+    return datetime.fromtimestamp(commit_time, commit_timezone).strftime(
+        "%Y-%m-%d %H:%M:%S %z"
+    )
+
+
+def _iter_nul_fields(
+    stream: IO[bytes], stage_name: str, *, timed: bool = True
+) -> Iterator[bytes]:
+    """Yield the NUL-terminated fields of stream, reading it in chunks.
+
+    Bytes read are counted for the stage_name stage. When timed, reading and
+    splitting each chunk is timed as that stage too; time the caller spends
+    between fields is not.
+    """
+    pending = b""
+    while True:
+        with profiling.stage(stage_name) if timed else contextlib.nullcontext():
+            chunk = stream.read(_READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            profiling.add_bytes(stage_name, len(chunk))
+            *fields, pending = (pending + chunk).split(b"\0")
+        yield from fields
+
+
+def iter_commits(repo_path: str) -> Iterator[tuple[str, int, int]]:
+    """Yield (commit_hash, commit_time, utc_offset) from Git history, oldest first.
+
+    Fields are read incrementally from a NUL-delimited `git log` pipe, so memory
+    does not grow with the length of the history and no date text is parsed.
+    An empty repository yields nothing.
 
     Args:
         repo_path: Path to Git repository
 
-    Returns:
-        List of tuples containing (commit_hash, git_timestamp_string).
-        Timestamp format matches Git's default: "YYYY-MM-DD HH:MM:SS +ZZZZ"
+    Yields:
+        Tuples containing (commit_hash, commit_time, utc_offset): the full
+        commit hash, the author time in seconds since the epoch, and the
+        author's UTC offset in minutes (as Git's "+ZZZZ" shows it)
 
     Raises:
         GitError: If directory is not a Git repository
     """
     try:
-        output = (
-            subprocess.check_output(
-                ["/usr/bin/git", "log", "--format=%h %ai"],
+        with profiling.stage("git.log"):
+            process = subprocess.Popen(
+                [
+                    "/usr/bin/git",
+                    "log",
+                    "--reverse",
+                    "-z",
+                    "--format=%H%x00%at%x00%ad",
+                    "--date=format:%z",
+                ],
                 cwd=repo_path,
-                stderr=subprocess.STDOUT,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
             )
-            .decode()
-            .strip()
-        )
-        if not output:
-            # Empty repo (initialized but no commits)
-            return []
-
-        commits = []
-        for line in output.splitlines():
-            parts = line.split(maxsplit=1)
-            commit_hash = parts[0]
-            git_timestamp = parts[1]
-            commits.append((commit_hash, git_timestamp))
     except FileNotFoundError as e:
         msg = "Directory not found so we couldn't look for Git repo"
         raise GitError(msg) from e
+
+    with process:
+        fields = _iter_nul_fields(cast("IO[bytes]", process.stdout), "git.log")
+        for commit_hash, commit_time, git_offset in batched(fields, 3, strict=True):
+            yield (
+                commit_hash.decode(),
+                int(commit_time),
+                _utc_offset_minutes(git_offset.decode()),
+            )
+        error_output = cast("IO[bytes]", process.stderr).read().decode()
+
+    # Empty repositories (no commits yet) also fail, but simply have no history
+    if process.returncode and "not a git repository" in error_output.lower():
+        msg = "Not a Git repository"
+        raise GitError(msg)
+
+
+def get_commits(repo_path: str) -> list[tuple[str, int, int]]:
+    """Get list of (commit_hash, commit_time, utc_offset) from Git history.
+
+    Commits are listed newest first.
+
+    Args:
+        repo_path: Path to Git repository
+
+    Returns:
+        List of tuples containing (commit_hash, commit_time, utc_offset), as
+        for iter_commits
+
+    Raises:
+        GitError: If directory is not a Git repository
+    """
+    commits = list(iter_commits(repo_path))
+    commits.reverse()
+    return commits
+
+
+def _log_raw_args(pathspecs: list[str]) -> list[str]:
+    """Git arguments logging every commit's changes to files matching pathspecs.
+
+    Commits come oldest first, each with its full hash and parents, followed by
+    its changes against its first parent (merges included) as raw diff records,
+    all in NUL-terminated fields.
+    """
+    return [
+        "log",
+        "--reverse",
+        "-z",
+        "--full-history",
+        "--sparse",
+        "--root",
+        "--raw",
+        "--no-abbrev",
+        "--no-renames",
+        "--diff-merges=first-parent",
+        "--format=commit %H %P",
+        "--",
+        *pathspecs,
+    ]
+
+
+def _diff_tree_args(
+    old_commit: str | None, new_commit: str, pathspecs: list[str]
+) -> list[str]:
+    """Git arguments listing files matching pathspecs changed between commits.
+
+    With old_commit None, new_commit is compared with the empty tree, listing
+    every matching file.
+    """
+    return [
+        "diff-tree",
+        "-r",
+        "-z",
+        "--raw",
+        "--no-abbrev",
+        old_commit or _EMPTY_TREES[len(new_commit)],
+        new_commit,
+        "--",
+        *pathspecs,
+    ]
+
+
+def _parse_raw_change(meta: bytes, file_path: bytes) -> tuple[str, str | None]:
+    """Parse one raw diff record, as split by -z, into (file_path, blob_sha).
+
+    meta is ":old_mode new_mode old_sha new_sha status" and file_path the path's
+    bytes as stored by Git (unquoted), decoded with surrogateescape so that paths
+    that are not UTF-8 still parse. Deleted files (and files replaced by a
+    submodule) have a blob_sha of None.
+    """
+    _, new_mode, _, new_sha, status = meta.split()
+    is_removed = status == b"D" or new_mode == _SUBMODULE_MODE
+    return (
+        file_path.decode(errors="surrogateescape"),
+        None if is_removed else new_sha.decode(),
+    )
+
+
+def _parse_diff_tree(diff_output: bytes) -> list[tuple[str, str | None]]:
+    """List (file_path, blob_sha) for the files in `diff-tree -z` output.
+
+    Deleted files (and files replaced by a submodule) have a blob_sha of None.
+    """
+    # NUL-terminated ":meta" and path fields alternate
+    fields = diff_output.split(b"\0")
+    return [
+        _parse_raw_change(meta, file_path)
+        for meta, file_path in zip(fields[0:-1:2], fields[1::2], strict=True)
+    ]
+
+
+def _tree_changes(
+    repo_path: str, old_commit: str | None, new_commit: str, pathspecs: list[str]
+) -> list[tuple[str, str | None]]:
+    """List changes to files matching pathspecs since old_commit (None: every file).
+
+    Raises:
+        subprocess.CalledProcessError: If the trees cannot be compared
+    """
+    with profiling.stage("git.diff_tree"):
+        diff_output = subprocess.check_output(  # noqa: S603
+            ["/usr/bin/git", *_diff_tree_args(old_commit, new_commit, pathspecs)],
+            cwd=repo_path,
+        )
+    profiling.add_bytes("git.diff_tree", len(diff_output))
+    return _parse_diff_tree(diff_output)
+
+
+def _iter_logged_commits(
+    repo_path: str, pathspecs: list[str]
+) -> Generator[_LoggedCommit]:
+    """Yield (commit_hash, first_parent, changes) from one `git log -z --raw` pass.
+
+    The log is streamed, so memory does not grow with the length of the
+    history. A log that cannot be read yields nothing.
+    """
+    process = subprocess.Popen(  # noqa: S603
+        ["/usr/bin/git", *_log_raw_args(pathspecs)],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    commit: tuple[str, str | None] | None = None
+    changes: list[tuple[str, str | None]] = []
+    with process:
+        # Time is counted by _TreeReplay.plan, which consumes the log
+        fields = _iter_nul_fields(
+            cast("IO[bytes]", process.stdout), "git.log_raw", timed=False
+        )
+        for field in fields:
+            # A "commit" header field is followed by its ":meta" and path fields
+            if field.startswith((b":", b"\n:")):
+                changes.append(_parse_raw_change(field, next(fields, b"")))
+            elif field.startswith(b"commit "):
+                if commit is not None:
+                    yield *commit, changes
+                _, commit_hash, *parents = field.decode().split()
+                commit, changes = (commit_hash, parents[0] if parents else None), []
+        if commit is not None:
+            yield *commit, changes
+
+
+class _TreeReplay:
+    """Follow a walk through the commits by replaying one `git log --raw` pass.
+
+    Each logged commit carries its changes against its first parent, so a walk
+    along a line of history (skipped commits included) is replayed without
+    running Git again. Only a jump to another branch needs Git to list or
+    compare the trees.
+
+        replay = _TreeReplay(_iter_logged_commits(repo_path))
+        base, changes = replay.plan(commit_hash)
+    """
+
+    def __init__(self, logged_commits: Iterator[_LoggedCommit]) -> None:
+        """Replay logged_commits, which must be in the walk's (oldest first) order."""
+        self._logged_commits = logged_commits
+        self._planned: str | None = None
+
+    def plan(
+        self, commit_hash: str
+    ) -> tuple[str | None, list[tuple[str, str | None]] | None]:
+        """Advance the log to commit_hash, returning (base, changes).
+
+        base is the commit planned before (None for the first) and changes
+        lead from base to commit_hash. changes is None when the log cannot
+        chain from base to commit_hash.
+        """
+        base, self._planned = self._planned, commit_hash
+        reached, changes = base, []
+        with profiling.stage("git.log_raw"):
+            for logged_hash, first_parent, logged_changes in self._logged_commits:
+                if first_parent == reached:
+                    reached = logged_hash
+                    changes += logged_changes
+                if logged_hash == commit_hash:
+                    return base, changes if reached == commit_hash else None
+        # Not in the log (it has ended): Git must compare the trees from now on
+        return base, None
+
+
+def _apply_blob_changes(
+    python_blobs: dict[str, str], changes: Iterable[tuple[str, str | None]]
+) -> None:
+    """Update file_path -> blob_sha in place, removing files whose blob_sha is None."""
+    for file_path, blob_sha in changes:
+        if blob_sha is None:
+            python_blobs.pop(file_path, None)
+        else:
+            python_blobs[file_path] = blob_sha
+
+
+def _walk_python_blobs(
+    repo_path: str,
+    commits: Iterable[tuple[str, int, int]],
+    analysed: Container[str] = frozenset(),
+    pathspecs: list[str] | None = None,
+) -> Iterator[tuple[tuple[str, int, int], dict[str, str] | None]]:
+    """Yield (commit, python_blobs) for each commit (as from iter_commits), oldest first.
+
+    Only files matching pathspecs (default: as DEFAULT_PATH_FILTER) are walked.
+    File changes come from a single streamed `git log --raw` pass, replayed in
+    step with the walk (see _TreeReplay), so a linear history needs no Git
+    process per commit. Where the log cannot chain to the next commit,
+    diff-tree lists it in full (first commit) or compares it with the previous
+    one, so per-commit work still scales with the size of the change.
+
+    Commits in analysed are yielded with python_blobs None; the log is still
+    followed through them. The yielded python_blobs dict (file_path ->
+    blob_sha) is updated in place.
+    """
+    if pathspecs is None:
+        pathspecs = to_pathspecs(DEFAULT_PATH_FILTER)
+    python_blobs: dict[str, str] = {}
+    previous_commit: str | None = None
+    with contextlib.closing(_iter_logged_commits(repo_path, pathspecs)) as logged_commits:
+        replay = _TreeReplay(logged_commits)
+        for commit in commits:
+            commit_hash = commit[0]
+            base, changes = replay.plan(commit_hash)
+            if base != previous_commit:
+                changes = None
+            if commit_hash in analysed:
+                if changes is not None:
+                    _apply_blob_changes(python_blobs, changes)
+                    previous_commit = commit_hash
+                yield commit, None
+                continue
+            if changes is None:
+                try:
+                    changes = _tree_changes(
+                        repo_path, previous_commit, commit_hash, pathspecs
+                    )
+                except subprocess.CalledProcessError:
+                    # Silently skip commits with errors (e.g., empty commits)
+                    continue
+            _apply_blob_changes(python_blobs, changes)
+            previous_commit = commit_hash
+            yield commit, python_blobs
+
+
+def _count_blobs(
+    blobs: dict[str, bytes | None], executor: Executor | None
+) -> dict[str, LineCounts | None]:
+    """Classify a batch of blob contents, mapping unreadable blobs to None."""
+    readable = {
+        blob_sha: content for blob_sha, content in blobs.items() if content is not None
+    }
+    classified = classify_many(list(readable.values()), executor)
+
+    line_counts: dict[str, LineCounts | None] = dict.fromkeys(blobs)
+    for blob_sha, result in zip(readable, classified, strict=True):
+        line_counts[blob_sha] = (
+            result.docstring_lines,
+            result.comment_lines,
+            result.code_lines,
+            result.total_lines,
+        )
+    return line_counts
+
+
+def _split_cached(
+    blob_shas: list[str], cache: ClassificationCache | None
+) -> tuple[dict[str, LineCounts], list[str]]:
+    """Look blob_shas up in cache, before any of them is read from Git.
+
+    Returns:
+        Line counts found in the cache, and the blob SHAs still to be read
+    """
+    if cache is None:
+        return {}, blob_shas
+    cached = cache.get_many(blob_shas)
+    profiling.count("classify_cache.hits", len(cached))
+    profiling.count("classify_cache.misses", len(blob_shas) - len(cached))
+    return cached, [blob_sha for blob_sha in blob_shas if blob_sha not in cached]
+
+
+def _count_blobs_cached(
+    blobs: dict[str, bytes | None],
+    executor: Executor | None,
+    cache: ClassificationCache | None,
+) -> dict[str, LineCounts | None]:
+    """Classify blobs (missing from cache, see _split_cached), adding them to it."""
+    line_counts = _count_blobs(blobs, executor)
+    if cache is not None:
+        cache.put_many(
+            {
+                blob_sha: counts
+                for blob_sha, counts in line_counts.items()
+                if counts is not None
+            }
+        )
+    return line_counts
+
+
+def _commit_rows(
+    commit_files: list[tuple[str, list[tuple[str, str]]]],
+    line_counts: dict[str, LineCounts | None],
+) -> list[tuple[str, list[FileRow]]]:
+    """Build (commit_hash, file_rows) for each commit from its classified blobs."""
+    rows = []
+    for commit_hash, blobs in commit_files:
+        file_rows: list[FileRow] = []
+        for file_path, blob_sha in blobs:
+            counts = line_counts[blob_sha]
+            if counts is None:
+                # Silently skip files that can't be read
+                continue
+
+            docstring_lines, comment_lines, code_lines, total_lines = counts
+            # Paths that are not UTF-8 keep their valid parts, readably
+            readable_path = file_path.encode(errors="surrogateescape").decode(
+                errors="replace"
+            )
+            file_rows.append(
+                (
+                    filedir_of(readable_path),
+                    Path(readable_path).name,
+                    code_lines,
+                    docstring_lines,
+                    comment_lines,
+                    total_lines,
+                )
+            )
+        rows.append((commit_hash, file_rows))
+    return rows
+
+
+def _iter_batches(  # noqa: PLR0913 (walk, filters and readers of one run)
+    repo_path: str,
+    commits: Iterable[tuple[str, int, int]],
+    analysed: Container[str],
+    pathspecs: list[str],
+    git_concurrency: int = 1,
+    cache: ClassificationCache | None = None,
+) -> Iterator[_Batch]:
+    """Walk commits (oldest first), reading new blobs, and yield bounded batches.
+
+    A batch is yielded once it holds _CLASSIFY_BATCH_SIZE new blobs or commits,
+    so its size does not depend on the length of the history. New blobs are
+    looked up in cache first, and only those it lacks are read from Git. With
+    git_concurrency above 1, the asyncio engine runs that many Git processes
+    at once instead.
+    """
+    if git_concurrency > 1:
+        yield from iterate(
+            _aiter_batches(
+                repo_path, commits, analysed, pathspecs, git_concurrency, cache
+            )
+        )
+        return
+
+    ordered: list[tuple[str, int, int]] = []
+    new_commits: list[tuple[str, list[tuple[str, str]]]] = []
+    new_blob_shas: list[str] = []
+    seen_blobs: set[str] = set()
+
+    with BlobReader(repo_path) as blob_reader:
+
+        def read_batch() -> tuple[dict[str, LineCounts], dict[str, bytes | None]]:
+            cached, to_read = _split_cached(new_blob_shas, cache)
+            return cached, {blob_sha: blob_reader.read(blob_sha) for blob_sha in to_read}
+
+        for commit, python_blobs in _walk_python_blobs(
+            repo_path, commits, analysed, pathspecs
+        ):
+            ordered.append(commit)
+            if python_blobs is not None:
+                for blob_sha in python_blobs.values():
+                    # Blob SHAs are content hashes: unchanged files are read once
+                    if blob_sha not in seen_blobs:
+                        seen_blobs.add(blob_sha)
+                        new_blob_shas.append(blob_sha)
+                new_commits.append((commit[0], list(python_blobs.items())))
+
+            if (
+                len(new_blob_shas) >= _CLASSIFY_BATCH_SIZE
+                or len(ordered) >= _CLASSIFY_BATCH_SIZE
+            ):
+                yield ordered, new_commits, *read_batch()
+                ordered, new_commits, new_blob_shas = [], [], []
+
+        yield ordered, new_commits, *read_batch()
+
+
+async def _python_blob_changes(
+    repo_path: str,
+    old_commit: str | None,
+    new_commit: str,
+    pathspecs: list[str],
+    limit: asyncio.Semaphore,
+) -> list[tuple[str, str | None]] | subprocess.CalledProcessError:
+    """List changes to files matching pathspecs since old_commit (None: every file).
+
+    Returns the error instead of raising it when the trees cannot be compared,
+    so one failing commit does not cancel the others running with it.
+    """
+    try:
+        with profiling.stage("git.diff_tree"):
+            diff_output = await run_git(
+                repo_path, _diff_tree_args(old_commit, new_commit, pathspecs), limit
+            )
     except subprocess.CalledProcessError as e:
-        error_msg = e.output.decode() if e.output else ""
-        if "not a git repository" in error_msg.lower():
-            msg = "Not a Git repository"
-            raise GitError(msg) from e
-        # Empty repository (no commits yet)
-        return []
-    else:
-        return commits
+        return e
+    profiling.add_bytes("git.diff_tree", len(diff_output))
+    return _parse_diff_tree(diff_output)
+
+
+async def _aiter_batches(  # noqa: PLR0913 (as for _iter_batches)
+    repo_path: str,
+    commits: Iterable[tuple[str, int, int]],
+    analysed: Container[str],
+    pathspecs: list[str],
+    concurrency: int,
+    cache: ClassificationCache | None = None,
+) -> AsyncIterator[_Batch]:
+    """Yield the same batches as _iter_batches, running Git processes concurrently.
+
+    For each window of _CLASSIFY_BATCH_SIZE commits, changes are replayed from
+    the `git log --raw` pass as in _walk_python_blobs; the tree commands for
+    commits the log cannot chain to run at once (each against the commit
+    planned before it) and all are applied in order. Then the window's new
+    blobs missing from cache are read by concurrent `git cat-file` processes.
+    At most concurrency Git processes run at any time, so waits on slow
+    (network) filesystems overlap instead of adding up.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    python_blobs: dict[str, str] = {}
+    previous_commit: str | None = None
+    seen_blobs: set[str] = set()
+
+    with contextlib.closing(_iter_logged_commits(repo_path, pathspecs)) as logged_commits:
+        replay = _TreeReplay(logged_commits)
+        commit_iterator = iter(commits)
+        while window := list(islice(commit_iterator, _CLASSIFY_BATCH_SIZE)):
+            plans = [replay.plan(commit_hash) for commit_hash, _, _ in window]
+            to_run = [
+                (commit_hash, base)
+                for (commit_hash, _, _), (base, changes) in zip(
+                    window, plans, strict=True
+                )
+                if changes is None and commit_hash not in analysed
+            ]
+            results = await asyncio.gather(
+                *(
+                    _python_blob_changes(repo_path, base, commit_hash, pathspecs, limit)
+                    for commit_hash, base in to_run
+                )
+            )
+            run_changes = dict(
+                zip([commit_hash for commit_hash, _ in to_run], results, strict=True)
+            )
+
+            ordered: list[tuple[str, int, int]] = []
+            new_commits: list[tuple[str, list[tuple[str, str]]]] = []
+            new_blob_shas: list[str] = []
+            for commit, (base, planned) in zip(window, plans, strict=True):
+                commit_hash = commit[0]
+                changes = run_changes.get(commit_hash, planned)
+                if commit_hash in analysed:
+                    if base == previous_commit and planned is not None:
+                        _apply_blob_changes(python_blobs, planned)
+                        previous_commit = commit_hash
+                    ordered.append(commit)
+                    continue
+                if base != previous_commit:
+                    # An earlier commit was skipped: compare with the last one walked
+                    changes = await _python_blob_changes(
+                        repo_path, previous_commit, commit_hash, pathspecs, limit
+                    )
+                if changes is None or isinstance(changes, subprocess.CalledProcessError):
+                    # Silently skip commits with errors (e.g., empty commits)
+                    continue
+                _apply_blob_changes(python_blobs, changes)
+                previous_commit = commit_hash
+                new_commits.append((commit_hash, list(python_blobs.items())))
+                # Blob SHAs are content hashes: unchanged files are read once
+                unseen_blobs = set(python_blobs.values()) - seen_blobs
+                seen_blobs |= unseen_blobs
+                new_blob_shas += unseen_blobs
+                ordered.append(commit)
+
+            cached, to_read = _split_cached(new_blob_shas, cache)
+            new_blobs = await read_blobs(repo_path, to_read, limit, concurrency)
+            yield ordered, new_commits, cached, new_blobs
+
+
+def _read_ahead(batches: Iterator[_Batch]) -> Iterator[_Batch]:
+    """Produce batches in a reader thread, at most _QUEUED_BATCHES ahead.
+
+    Git reads overlap with classification, while the bounded queue blocks the
+    reader whenever classification falls behind, keeping peak memory flat.
+    Exceptions raised by the reader are re-raised here.
+    """
+    queue: Queue[_Batch | Exception | None] = Queue(maxsize=_QUEUED_BATCHES)
+    stopped = threading.Event()
+
+    def read() -> None:
+        try:
+            for batch in batches:
+                if stopped.is_set():
+                    return
+                queue.put(batch)
+        except Exception as e:  # noqa: BLE001 (re-raised in the consuming thread)
+            queue.put(e)
+        else:
+            queue.put(None)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while (item := queue.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblock a reader waiting on a full queue if we stopped early
+        stopped.set()
+        while reader.is_alive():
+            with contextlib.suppress(Empty):
+                queue.get(timeout=0.1)
+
+
+def _analyse_history(  # noqa: PLR0913 (stages share the run's resources)
+    repo_path: str,
+    commits: Iterable[tuple[str, int, int]],
+    store: HistoryStore,
+    executor: Executor | None,
+    pathspecs: list[str],
+    git_concurrency: int = 1,
+    cache: ClassificationCache | None = None,
+) -> tuple[int, int, int, int]:
+    """Stream commits (oldest first) through classification into the store.
+
+    Commits already in the store are only queued for export; the rest have every
+    file matching pathspecs classified (or looked up in cache) and recorded. Each batch is
+    recorded in one store transaction, so an interrupted run keeps every
+    completed batch.
+
+    Returns:
+        Number of commits, commits reused from the store, unique file versions
+        (blobs) seen, and how many of those came from cache
+    """
+    # Line counts per blob SHA, classified once each (None if unreadable)
+    line_counts: dict[str, LineCounts | None] = {}
+    commit_count = reused_count = files_seen = cached_count = 0
+
+    analysed = store.analysed_commit_ids()
+    for ordered, new_commits, cached, new_blobs in _read_ahead(
+        _iter_batches(repo_path, commits, analysed, pathspecs, git_concurrency, cache)
+    ):
+        store.add_export_commits(ordered)
+        line_counts.update(cached)
+        line_counts.update(_count_blobs_cached(new_blobs, executor, cache))
+        store.add_commits(_commit_rows(new_commits, line_counts))
+        commit_count += len(ordered)
+        reused_count += len(ordered) - len(new_commits)
+        files_seen += sum(len(blobs) for _, blobs in new_commits)
+        cached_count += len(cached)
+
+    profiling.count("history_store.hits", reused_count)
+    profiling.count("history_store.misses", commit_count - reused_count)
+    profiling.count("blob_cache.hits", files_seen - len(line_counts))
+    profiling.count("blob_cache.misses", len(line_counts))
+    return commit_count, reused_count, len(line_counts), cached_count
+
+
+def _write_csv(output_file: Path, repo_name: str, store: HistoryStore) -> int:
+    """Write the CSV for the store's export commits, returning data rows.
+
+    Rows are streamed from the store through a buffered writer. commit_date is
+    formatted as Git's default "YYYY-MM-DD HH:MM:SS +ZZZZ", once per commit.
+    """
+    rows_written = 0
+    formatted_commit, git_timestamp = None, ""
+    with (
+        profiling.stage("csv.write"),
+        output_file.open("w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as f,
+    ):
+        f.write(",".join(HISTORY_COLUMNS) + "\n")
+        for (
+            commit_hash,
+            commit_time,
+            utc_offset,
+            filedir,
+            filename,
+            code_lines,
+            docstring_lines,
+            comment_lines,
+            total_lines,
+        ) in store.iter_export_rows():
+            documentation_lines = docstring_lines + comment_lines
+            if commit_hash != formatted_commit:
+                formatted_commit = commit_hash
+                git_timestamp = _git_timestamp(commit_time, utc_offset)
+
+            # Write single row with all columns
+            f.write(
+                f"{repo_name},{git_timestamp},{commit_hash},{filedir},{filename},"
+                f"{code_lines},{docstring_lines},{comment_lines},"
+                f"{total_lines},{documentation_lines}\n"
+            )
+            rows_written += 1
+    profiling.add_bytes("csv.write", output_file.stat().st_size)
+    return rows_written
 
 
-def generate_csv(repo_path: str, output_dir: str) -> str:
-    """Generate CSV file from Git commit history.
+def _write_summary_csv(summary_file: Path, repo_name: str, store: HistoryStore) -> None:
+    """Write the per-commit summary CSV: line totals per filedir of each commit.
+
+    Files in EXCLUDED_FILENAMES are left out, as in the charts, so charts that
+    need no per-file detail can read this table instead of the history file.
+    """
+    with (
+        profiling.stage("summary.write"),
+        summary_file.open("w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as f,
+    ):
+        f.write(",".join(SUMMARY_COLUMNS) + "\n")
+        for (
+            commit_hash,
+            commit_time,
+            utc_offset,
+            filedir,
+            code_lines,
+            docstring_lines,
+            comment_lines,
+            total_lines,
+        ) in store.iter_export_summary(EXCLUDED_FILENAMES):
+            git_timestamp = _git_timestamp(commit_time, utc_offset)
+            f.write(
+                f"{repo_name},{git_timestamp},{commit_hash},{filedir},"
+                f"{code_lines},{docstring_lines},{comment_lines},"
+                f"{total_lines},{docstring_lines + comment_lines}\n"
+            )
+    profiling.add_bytes("summary.write", summary_file.stat().st_size)
+
+
+def generate_csv(  # noqa: PLR0913 (mirrors the CLI options)
+    repo_path: str,
+    output_dir: str,
+    jobs: int = 1,
+    output_format: OutputFormat = "csv",
+    executor: Executor | None = None,
+    sampling: Sampling = NO_SAMPLING,
+    git_concurrency: int = 1,
+    cache: ClassificationCache | None = None,
+    path_filter: PathFilter = DEFAULT_PATH_FILTER,
+) -> str:
+    """Generate CSV (or Parquet/Feather) history file from Git commit history.
 
     Args:
         repo_path: Path to Git repository
-        output_dir: Directory where CSV file should be written
+        output_dir: Directory where history file and its history store are written.
+            Commits already in the store are reused rather than re-analysed.
+        jobs: Number of worker processes classifying files (1 = serial)
+        output_format: "csv", or "parquet"/"feather" for a typed columnar file
+            (needs pyarrow)
+        executor: Existing pool to classify files in, shared across calls
+            (overrides jobs)
+        sampling: (every, per, max_commits) to thin the commits before analysis,
+            as for sample_commits; the history file holds only sampled commits
+        git_concurrency: Number of Git processes to run at once (1 = one after
+            another); above 1, tree diffs and blob reads overlap on asyncio
+        cache: Persistent classification cache to reuse line counts from (and
+            add new ones to) across repositories and runs
+        path_filter: (include, exclude) globs choosing the Python files to
+            analyse, matched by Git itself (see to_pathspecs); each file's
+            filedir is its top-level directory
 
     Returns:
-        Path to the generated CSV file
+        Path to the generated history file (repo_history.<format>); a per-commit
+        summary is written beside it as repo_summary.<format>
 
     Raises:
         SystemExit: If Git log cannot be read or no Python files found
@@ -79,101 +866,74 @@ def generate_csv(repo_path: str, output_dir: str) -> str:
     repo_name = Path(repo_path).resolve().name
 
     # Construct output file path
-    output_file = Path(output_dir) / "repo_history.csv"
+    output_file = Path(output_dir) / f"repo_history.{output_format}"
+    summary_file = Path(output_dir) / f"repo_summary.{output_format}"
     file_exists = output_file.exists()
 
-    # Get commits
+    # Read the first commit up front, so Git errors surface before any output
+    every, per, max_commits = sampling
+    commits = sample_commits(iter_commits(repo_path), every, per, max_commits)
     try:
-        commits = get_commits(repo_path)
+        first_commit = next(commits, None)
     except GitError as e:
         print(f"❌  {e}")
         sys.exit(1)
 
-    if not commits:
+    if first_commit is None:
         print("❌  No commits yet in this repository")
         sys.exit(1)
 
-    # Track statistics
-    total_python_files = 0
-    lines_written = 0
-
-    with output_file.open("w", encoding="utf-8") as f:
-        f.write(
-            "repo_name,commit_date,commit_id,filedir,filename,code_lines,docstring_lines,"
-            "comment_lines,total_lines,documentation_lines\n"
+    # Analyse only commits missing from the store, then export the full history.
+    # Commits stored under other globs, or by another classifier, are analysed afresh.
+    pathspecs = to_pathspecs(path_filter)
+    store_file = Path(output_dir) / "repo_history.sqlite"
+    scope = "\n".join([CLASSIFIER_VERSION, *pathspecs])
+    with (
+        HistoryStore(store_file, scope=scope) as store,
+        contextlib.nullcontext(executor)
+        if executor is not None or jobs == 1
+        else ProcessPoolExecutor(jobs, mp_context=POOL_CONTEXT) as pool,
+    ):
+        commit_count, reused, unique_files, cached_files = _analyse_history(
+            repo_path,
+            chain([first_commit], commits),
+            store,
+            pool,
+            pathspecs,
+            git_concurrency,
+            cache,
         )
-        lines_written += 1
-
-        for commit_hash, git_timestamp in commits:
-            try:
-                tree_output = (
-                    subprocess.check_output(  # noqa: S603
-                        [
-                            "/usr/bin/git",
-                            "ls-tree",
-                            "-r",
-                            "--name-only",
-                            commit_hash,
-                            "src/",
-                            "tests/",
-                        ],
-                        cwd=repo_path,
-                    )
-                    .decode()
-                    .strip()
-                )
-                files = [f for f in tree_output.splitlines() if f.endswith(".py")]
-            except subprocess.CalledProcessError:
-                # Silently skip commits with errors (e.g., empty commits)
-                continue
-
-            for file_path in files:
-                total_python_files += 1
-                filedir = (
-                    "src"
-                    if file_path.startswith("src/")
-                    else "tests"
-                    if file_path.startswith("tests/")
-                    else None
-                )
-                if not filedir:
-                    continue
-
-                filename = Path(file_path).name
+        if output_format == "csv":
+            rows_written = _write_csv(output_file, repo_name, store)
+            _write_summary_csv(summary_file, repo_name, store)
+        else:
+            from . import columnar  # noqa: PLC0415 (loads pandas only for typed output)
 
-                try:
-                    content_output = subprocess.check_output(  # noqa: S603
-                        ["/usr/bin/git", "show", f"{commit_hash}:{file_path}"],
-                        cwd=repo_path,
-                    )
-                    content = content_output.decode("utf-8", errors="ignore")
-                except subprocess.CalledProcessError:
-                    # Silently skip files that can't be read
-                    continue
-
-                docstring_lines, comment_lines, code_lines = classify_lines(content)
-                documentation_lines = docstring_lines + comment_lines
-                total_lines = len(content.splitlines())
-
-                # Write single row with all columns
-                #  (timestamp format: "YYYY-MM-DD HH:MM:SS +ZZZZ")
-                f.write(
-                    f"{repo_name},{git_timestamp},{commit_hash},{filedir},{filename},"
-                    f"{code_lines},{docstring_lines},{comment_lines},"
-                    f"{total_lines},{documentation_lines}\n"
-                )
-                lines_written += 1
+            rows_written = columnar.write_history(
+                output_file, repo_name, store, output_format
+            )
+            columnar.write_summary(summary_file, repo_name, store, output_format)
 
     # Check if any Python files were found
-    if total_python_files == 0:
-        print("❌  No Python files found in src/ or tests/ directories")
-        output_file.unlink()  # Clean up empty CSV
+    if rows_written == 0:
+        include, _ = path_filter
+        print(f"❌  No Python files found matching {' or '.join(include)}")
+        output_file.unlink()  # Clean up empty history and summary files
+        summary_file.unlink()
+        store_file.unlink()
         sys.exit(1)
 
     # Success message
     overwrite_msg = " (overwrote existing file)" if file_exists else ""
     print(f"✅  Success! Created {output_file}{overwrite_msg}")
-    print(f"    • {len(commits)} commits analyzed")
-    print(f"    • {lines_written:,} lines written")
+    print(f"    • Per-commit totals in {summary_file.name}")
+    reused_msg = f" ({reused} reused from {store_file.name})" if reused else ""
+    print(f"    • {commit_count} commits analyzed{reused_msg}")
+    cached_msg = f" ({cached_files:,} from classification cache)" if cached_files else ""
+    print(f"    • {unique_files:,} unique file versions classified{cached_msg}")
+    if output_format == "csv":
+        print(f"    • {rows_written + 1:,} lines written")
+    else:
+        print(f"    • {rows_written:,} rows written")
 
     return str(output_file)
@@ -0,0 +1,196 @@
+"""Persistent SQLite store of analysed commits for incremental runs."""
+
+import json
+import sqlite3
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from . import profiling
+
+# Per-file line counts: (filedir, filename, code, docstring, comment, total)
+type FileRow = tuple[str, str, int, int, int, int]
+
+# A FileRow prefixed with its commit_id, commit_time and utc_offset, as exported
+type ExportRow = tuple[str, int, int, str, str, int, int, int, int]
+
+# Per-filedir line totals (code, docstring, comment, total) prefixed with the
+# commit_id, commit_time, utc_offset and filedir
+type SummaryRow = tuple[str, int, int, str, int, int, int, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    commit_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS files (
+    commit_id TEXT NOT NULL,
+    filedir TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    code_lines INTEGER NOT NULL,
+    docstring_lines INTEGER NOT NULL,
+    comment_lines INTEGER NOT NULL,
+    total_lines INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_commit ON files (commit_id);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class HistoryStore:
+    """SQLite store of per-file line counts keyed by commit hash.
+
+    Each commit is recorded together with all of its file rows inside one
+    transaction, so an interrupted run leaves only fully analysed commits behind
+    and the next run resumes from there.
+
+    The store remembers the scope (e.g. which files, and which classifier) its
+    commits were analysed with; opened with another scope, it forgets them, so no
+    history mixes scopes.
+    """
+
+    def __init__(self, db_path: Path, scope: str | None = None) -> None:
+        """Open (or create) the store at db_path for commits analysed with scope.
+
+        With scope None, the store is opened as it is, e.g. to export it.
+        """
+        self._connection = sqlite3.connect(db_path)
+        self._connection.executescript(_SCHEMA)
+        if scope is not None:
+            self._use_scope(scope)
+
+    def __enter__(self) -> Self:
+        """Return the store for use in a with block."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the database on leaving the with block."""
+        self.close()
+
+    def _use_scope(self, scope: str) -> None:
+        """Forget every recorded commit if they were analysed with another scope.
+
+        Stores from before scopes were recorded are forgotten too.
+        """
+        row = self._connection.execute(
+            "SELECT value FROM settings WHERE name = 'scope'"
+        ).fetchone()
+        if row is not None and row[0] == scope:
+            return
+        with self._connection:
+            self._connection.execute("DELETE FROM files")
+            self._connection.execute("DELETE FROM commits")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO settings VALUES ('scope', ?)", (scope,)
+            )
+
+    def analysed_commit_ids(self) -> set[str]:
+        """Return hashes of every commit already recorded."""
+        return {
+            commit_id
+            for (commit_id,) in self._connection.execute("SELECT commit_id FROM commits")
+        }
+
+    def add_commits(self, commits: Iterable[tuple[str, list[FileRow]]]) -> None:
+        """Record (commit_id, file_rows) pairs in a single transaction."""
+        with profiling.stage("store.write"), self._connection:
+            for commit_id, file_rows in commits:
+                self._connection.execute(
+                    "INSERT INTO commits (commit_id) VALUES (?)", (commit_id,)
+                )
+                self._connection.executemany(
+                    "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(commit_id, *file_row) for file_row in file_rows],
+                )
+
+    def add_export_commits(self, commits: Iterable[tuple[str, int, int]]) -> None:
+        """Queue (commit_id, commit_time, utc_offset) for export, after those queued.
+
+        commit_time is in seconds since the epoch and utc_offset in minutes. The
+        queue lives in a temporary table, so it is private to this connection and
+        never held in memory.
+        """
+        with self._connection:
+            self._connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS export_commits ("
+                "seq INTEGER PRIMARY KEY, commit_id TEXT NOT NULL, "
+                "commit_time INTEGER NOT NULL, utc_offset INTEGER NOT NULL)"
+            )
+            self._connection.executemany(
+                "INSERT INTO export_commits (commit_id, commit_time, utc_offset) "
+                "VALUES (?, ?, ?)",
+                commits,
+            )
+
+    def iter_export_rows(self) -> Iterator[ExportRow]:
+        """Yield an ExportRow per stored file of the queued commits, in queue order.
+
+        Commits that were never recorded (or have no Python files) yield nothing.
+        """
+        if not self._has_export_commits():
+            return
+        yield from self._connection.execute(
+            "SELECT export_commits.commit_id, commit_time, utc_offset, "
+            "filedir, filename, code_lines, docstring_lines, comment_lines, total_lines "
+            "FROM export_commits JOIN files "
+            "ON files.commit_id = export_commits.commit_id "
+            "ORDER BY export_commits.seq, files.rowid"
+        )
+
+    def iter_export_summary(
+        self, excluded_filenames: Sequence[str]
+    ) -> Iterator[SummaryRow]:
+        """Yield a SummaryRow per filedir of each queued commit, in queue order.
+
+        Files named in excluded_filenames are left out of the totals.
+        """
+        if not self._has_export_commits():
+            return
+        yield from self._connection.execute(
+            "SELECT export_commits.commit_id, commit_time, utc_offset, filedir, "
+            "SUM(code_lines), SUM(docstring_lines), SUM(comment_lines), SUM(total_lines) "
+            "FROM export_commits JOIN files "
+            "ON files.commit_id = export_commits.commit_id "
+            "WHERE filename NOT IN (SELECT value FROM json_each(?)) "
+            "GROUP BY export_commits.seq, filedir "
+            "ORDER BY export_commits.seq, filedir",
+            (json.dumps(list(excluded_filenames)),),
+        )
+
+    def export_utc_offsets(self, excluded_filenames: Sequence[str] = ()) -> set[int]:
+        """Return the UTC offsets of queued commits with files to export.
+
+        Files named in excluded_filenames are not counted, as for
+        iter_export_summary.
+        """
+        if not self._has_export_commits():
+            return set()
+        return {
+            utc_offset
+            for (utc_offset,) in self._connection.execute(
+                "SELECT DISTINCT utc_offset FROM export_commits WHERE EXISTS ("
+                "SELECT 1 FROM files WHERE files.commit_id = export_commits.commit_id "
+                "AND filename NOT IN (SELECT value FROM json_each(?)))",
+                (json.dumps(list(excluded_filenames)),),
+            )
+        }
+
+    def _has_export_commits(self) -> bool:
+        """Return whether add_export_commits has created the export queue."""
+        return bool(
+            self._connection.execute(
+                "SELECT 1 FROM sqlite_temp_master WHERE name = 'export_commits'"
+            ).fetchone()
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
@@ -0,0 +1,39 @@
+"""Choose which files to analyse with include and exclude globs, matched by Git."""
+
+# Path filter: (include, exclude) globs, as for to_pathspecs
+type PathFilter = tuple[tuple[str, ...], tuple[str, ...]]
+
+DEFAULT_INCLUDE = ("src/**/*.py", "tests/**/*.py")
+
+# Package markers would skew per-file views, so they are never analysed
+DEFAULT_EXCLUDE = ("**/__init__.py",)
+
+DEFAULT_PATH_FILTER: PathFilter = (DEFAULT_INCLUDE, DEFAULT_EXCLUDE)
+
+# Directory reported for files at the top of the repository
+ROOT_FILEDIR = "."
+
+
+def to_pathspecs(path_filter: PathFilter) -> list[str]:
+    """Turn (include, exclude) globs into Git pathspecs.
+
+    Git then matches every path itself, so files left out are never listed,
+    diffed or read. Globs follow Git's glob rules: "*" stays within one
+    directory and "**/" matches any number of them, so "src/**/*.py" matches
+    every Python file under src/ and "**/migrations/**" every file in any
+    migrations directory.
+    """
+    include, exclude = path_filter
+    return [
+        *(f":(glob){glob}" for glob in include),
+        *(f":(exclude,glob){glob}" for glob in exclude),
+    ]
+
+
+def filedir_of(file_path: str) -> str:
+    """Return the top-level directory of a repository path, e.g. "src".
+
+    Files at the top of the repository are in ROOT_FILEDIR.
+    """
+    top, separator, _ = file_path.partition("/")
+    return top if separator else ROOT_FILEDIR
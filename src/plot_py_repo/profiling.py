@@ -0,0 +1,189 @@
+"""Per-stage timing, call and byte counters, and Chrome trace export.
+
+Recording is off by default so instrumented code pays almost nothing. The CLI
+turns it on for `--profile` runs:
+
+    profiling.enable()
+    with profiling.stage("git.log"):
+        ...
+    profiling.add_bytes("git.log", len(output))
+    profiling.count("blob_cache.hits", 10)
+    print(profiling.summary())
+    profiling.write_trace(Path("profile_trace.json"))
+"""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# Counter suffixes that pair up into a hit ratio in the summary
+_HITS_SUFFIX = ".hits"
+_MISSES_SUFFIX = ".misses"
+
+
+class _Recorder:
+    """Mutable profiling state shared by the module-level functions."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset(enabled=False)
+
+    def reset(self, *, enabled: bool) -> None:
+        """Clear everything recorded and switch recording on or off."""
+        self.enabled = enabled
+        self.origin_ns = time.perf_counter_ns()
+        self.calls: dict[str, int] = {}
+        self.elapsed_ns: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.trace_events: list[dict] = []
+
+
+_recorder = _Recorder()
+
+
+def enable() -> None:
+    """Start recording, discarding anything recorded before."""
+    _recorder.reset(enabled=True)
+
+
+def disable() -> None:
+    """Stop recording and discard what was recorded."""
+    _recorder.reset(enabled=False)
+
+
+def is_enabled() -> bool:
+    """Return whether recording is on."""
+    return _recorder.enabled
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as one call of the named stage."""
+    if not _recorder.enabled:
+        yield
+        return
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end_ns = time.perf_counter_ns()
+        with _recorder.lock:
+            _recorder.calls[name] = _recorder.calls.get(name, 0) + 1
+            _recorder.elapsed_ns[name] = (
+                _recorder.elapsed_ns.get(name, 0) + end_ns - start_ns
+            )
+            _recorder.trace_events.append(
+                {
+                    "name": name,
+                    "cat": name.split(".")[0],
+                    "ph": "X",
+                    "ts": (start_ns - _recorder.origin_ns) / 1000,
+                    "dur": (end_ns - start_ns) / 1000,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }
+            )
+
+
+def add_bytes(name: str, byte_count: int) -> None:
+    """Add to the bytes processed by the named stage."""
+    if _recorder.enabled:
+        with _recorder.lock:
+            _recorder.bytes[name] = _recorder.bytes.get(name, 0) + byte_count
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a named counter (pair "<x>.hits" with "<x>.misses" for a hit ratio)."""
+    if _recorder.enabled:
+        with _recorder.lock:
+            _recorder.counters[name] = _recorder.counters.get(name, 0) + amount
+
+
+def stage_seconds() -> dict[str, float]:
+    """Return the total seconds recorded for each stage."""
+    with _recorder.lock:
+        return {name: ns / 1e9 for name, ns in _recorder.elapsed_ns.items()}
+
+
+def counters() -> dict[str, int]:
+    """Return the value of each named counter."""
+    with _recorder.lock:
+        return dict(_recorder.counters)
+
+
+def summary() -> str:
+    """Render recorded stages, counters and hit ratios as plain-text tables."""
+    stage_rows = [["stage", "calls", "total s", "mean ms", "MB", "MB/s"]]
+    for name in sorted(_recorder.elapsed_ns, key=_recorder.elapsed_ns.__getitem__)[::-1]:
+        seconds = _recorder.elapsed_ns[name] / 1e9
+        calls = _recorder.calls[name]
+        megabytes = _recorder.bytes.get(name, 0) / 1e6
+        stage_rows.append(
+            [
+                name,
+                f"{calls:,}",
+                f"{seconds:.3f}",
+                f"{seconds * 1000 / calls:.2f}",
+                f"{megabytes:.2f}" if name in _recorder.bytes else "",
+                f"{megabytes / seconds:.1f}"
+                if name in _recorder.bytes and seconds
+                else "",
+            ]
+        )
+
+    counter_rows = [["counter", "value"]]
+    counter_rows += [
+        [name, f"{value:,}"] for name, value in sorted(_recorder.counters.items())
+    ]
+    for name, hits in sorted(_recorder.counters.items()):
+        if name.endswith(_HITS_SUFFIX):
+            prefix = name.removesuffix(_HITS_SUFFIX)
+            lookups = hits + _recorder.counters.get(prefix + _MISSES_SUFFIX, 0)
+            if lookups:
+                counter_rows.append([f"{prefix} hit ratio", f"{hits / lookups:.1%}"])
+
+    return _format_table(stage_rows) + "\n\n" + _format_table(counter_rows)
+
+
+def _format_table(rows: list[list[str]]) -> str:
+    """Left-align the first column and right-align the rest."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+        )
+        for row in rows
+    )
+
+
+def write_trace(trace_path: Path) -> None:
+    """Write recorded stages as Chrome trace-event JSON (chrome://tracing, Perfetto).
+
+    Counters are appended as counter ("C") events at the end of the trace.
+    """
+    end_us = (time.perf_counter_ns() - _recorder.origin_ns) / 1000
+    counter_events = [
+        {
+            "name": name,
+            "ph": "C",
+            "ts": end_us,
+            "pid": os.getpid(),
+            "args": {"value": value},
+        }
+        for name, value in _recorder.counters.items()
+    ]
+    trace = {
+        "traceEvents": _recorder.trace_events + counter_events,
+        "displayTimeUnit": "ms",
+        "otherData": {
+            "bytes": _recorder.bytes,
+            "calls": _recorder.calls,
+        },
+    }
+    trace_path.write_text(json.dumps(trace) + "\n", encoding="utf-8")
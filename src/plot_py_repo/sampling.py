@@ -0,0 +1,98 @@
+"""Thin a commit stream before analysis, for quick charts of huge histories."""
+
+import math
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+type SamplingPeriod = Literal["day", "week", "month"]
+
+SAMPLING_PERIODS: tuple[SamplingPeriod, ...] = ("day", "week", "month")
+
+# Sampling options: (every, per, max_commits), as for sample_commits
+type Sampling = tuple[int, SamplingPeriod | None, int | None]
+
+NO_SAMPLING: Sampling = (1, None, None)
+
+
+def _period_key(commit: tuple[str, int, int], period: SamplingPeriod) -> tuple[int, ...]:
+    """Return the calendar period of a (commit_hash, commit_time, utc_offset) commit.
+
+    Uses the commit's own local date, as the evolution charts do.
+    """
+    _, commit_time, utc_offset = commit
+    local_date = datetime.fromtimestamp(
+        commit_time, timezone(timedelta(minutes=utc_offset))
+    ).date()
+    if period == "day":
+        return local_date.year, local_date.month, local_date.day
+    if period == "month":
+        return local_date.year, local_date.month
+    iso_year, iso_week, _ = local_date.isocalendar()
+    return iso_year, iso_week
+
+
+def _latest_per_period(
+    commits: Iterable[tuple[str, int, int]], period: SamplingPeriod
+) -> list[tuple[str, int, int]]:
+    """Keep the last commit (in log order) of each period, in log order.
+
+    Commits of one period need not be adjacent: author dates can run out of
+    order (rebases, merged branches), so a period is only settled at the end.
+    """
+    latest: dict[tuple[int, ...], tuple[int, tuple[str, int, int]]] = {}
+    for index, commit in enumerate(commits):
+        latest[_period_key(commit, period)] = index, commit
+    return [commit for _, commit in sorted(latest.values())]
+
+
+def _every_nth(
+    commits: Iterable[tuple[str, int, int]], every: int
+) -> Iterator[tuple[str, int, int]]:
+    """Keep every Nth commit, starting with the first, plus the last."""
+    skipped: tuple[str, int, int] | None = None
+    for index, commit in enumerate(commits):
+        if index % every == 0:
+            skipped = None
+            yield commit
+        else:
+            skipped = commit
+    if skipped is not None:
+        yield skipped
+
+
+def sample_commits(
+    commits: Iterable[tuple[str, int, int]],
+    every: int = 1,
+    per: SamplingPeriod | None = None,
+    max_commits: int | None = None,
+) -> Iterator[tuple[str, int, int]]:
+    """Thin commits, oldest first, keeping the newest.
+
+    Sampling applies in order: the latest commit per day, week or month, then
+    every Nth of those, then an even spread of at most max_commits. The newest
+    commit is always kept so charts end at the current state of the repository.
+
+    Only hashes and times pass through here, so thinning happens before any
+    tree or blob work. every streams; per and max_commits need the whole
+    list, but hold only (hash, time, offset) per commit.
+
+    Args:
+        commits: (commit_hash, commit_time, utc_offset) tuples, as from
+            iter_commits, oldest first
+        every: Keep every Nth commit (1 = all)
+        per: Keep only the latest commit per calendar period
+        max_commits: Keep at most this many commits, evenly spaced
+    """
+    if per is not None:
+        commits = _latest_per_period(commits, per)
+    if every > 1:
+        commits = _every_nth(commits, every)
+    if max_commits is None:
+        yield from commits
+        return
+
+    kept = list(commits)
+    stride = max(1, math.ceil(len(kept) / max_commits))
+    # Step back from the newest commit so it is always included
+    yield from kept[::-1][::stride][::-1]
@@ -1,10 +1,26 @@
-"""Centralised theming for Plotly visualisations."""
+"""Centralised theming and image export for Plotly visualisations."""
 
+import asyncio
+import contextlib
+import threading
+from collections.abc import AsyncIterator
 from pathlib import Path
+from queue import Queue
+from types import TracebackType
+from typing import Self
 
+import kaleido
 import pandas as pd
 from plotly.graph_objects import Figure
 
+from . import profiling
+
+# Render at base dimensions (700x500), then scale up to 1400x1000
+IMAGE_SCALE = 2
+
+# Browser tabs rendering charts concurrently in one Kaleido session
+_EXPORT_TABS = 3
+
 # Standard layout settings applied to all charts
 DEFAULT_LAYOUT = {
     "template": "plotly_dark",  # plotly_white, simple_white
@@ -95,4 +111,90 @@ def save_chart_image(fig: Figure, output_path: Path) -> None:
         fig: Plotly figure to save
         output_path: Path where WebP image should be saved
     """
-    fig.write_image(output_path, scale=2)
+    fig.write_image(output_path, scale=IMAGE_SCALE)
+
+
+class ChartExporter:
+    """Export many charts through one shared Kaleido browser session.
+
+    The browser starts in a background thread as soon as the exporter is created,
+    so its start-up overlaps with building the figures. Submitted figures are
+    rendered concurrently in separate browser tabs, at the same scale as
+    save_chart_image. Each image is reported as created once it is written,
+    when the exporter closes:
+
+        with ChartExporter() as exporter:
+            exporter.submit(fig, output_path)
+        # Every submitted image has been written (and reported) here
+    """
+
+    def __init__(self) -> None:
+        """Start the Kaleido browser session in a background thread."""
+        self._pending: Queue[tuple[Figure, Path] | None] = Queue()
+        self._submitted: list[Path] = []
+        self._closed = False
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> Self:
+        """Return the exporter for use in a with block."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Wait for every submitted chart on leaving the with block.
+
+        An exception leaving the block is not masked by export errors.
+        """
+        if exc is None:
+            self.close()
+            return
+        with contextlib.suppress(Exception):
+            self.close()
+
+    def submit(self, fig: Figure, output_path: Path) -> None:
+        """Queue fig to be written as an image to output_path."""
+        self._submitted.append(output_path)
+        self._pending.put((fig, output_path))
+
+    def close(self) -> None:
+        """Wait until every submitted chart is written, then shut the browser down.
+
+        Closing again does nothing.
+
+        Raises:
+            Exception: Whatever Kaleido raised while starting or rendering
+        """
+        if self._closed:
+            return
+        self._closed = True
+        with profiling.stage("charts.export"):
+            self._pending.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+        for output_path in self._submitted:
+            print(f"✅  Created {output_path}")
+
+    def _run(self) -> None:
+        """Render submitted charts until close(), keeping any error for close()."""
+        try:
+            asyncio.run(self._export())
+        except Exception as e:  # noqa: BLE001 (re-raised in the caller's thread)
+            self._error = e
+
+    async def _export(self) -> None:
+        """Feed submitted charts to one Kaleido session with several tabs."""
+        async with kaleido.Kaleido(n=_EXPORT_TABS) as session:
+            await session.write_fig_from_object(self._specs())
+
+    async def _specs(self) -> AsyncIterator[dict]:
+        """Yield a Kaleido render spec per submitted chart until close()."""
+        while (pending := await asyncio.to_thread(self._pending.get)) is not None:
+            fig, output_path = pending
+            yield {"fig": fig, "path": output_path, "opts": {"scale": IMAGE_SCALE}}
@@ -1,55 +1,394 @@
 """Visualization generation for Python repository evolution."""
 
 import sys
+from collections.abc import Hashable, Iterator
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any, cast
 
 import pandas as pd
 
-from . import chart_breakdown, chart_evolution, chart_evolution_commit
+from . import chart_breakdown, chart_evolution, chart_evolution_commit, profiling
+from .aggregation import commit_category_totals
+from .git_history import EXCLUDED_FILENAMES
+from .theme_plotly import ChartExporter
 
+# Column types in a CSV history (or summary) file; commit_date is parsed after loading
+_CSV_DTYPES: dict[Hashable, Any] = {
+    "repo_name": str,
+    "commit_id": str,
+    "filedir": str,
+    "filename": str,
+    "code_lines": int,
+    "docstring_lines": int,
+    "comment_lines": int,
+    "total_lines": int,
+    "documentation_lines": int,
+}
 
-def _load_csv(csv_path: str) -> pd.DataFrame:
-    """Load CSV history file containing Git commit metrics."""
+# Column types of a compact history: text repeated on every row is categorical,
+# so commit_id's categories form the commit table and its integer codes the
+# per-row key, and line counts are int32. commit_date is read as categorical
+# too, so each distinct timestamp is parsed once rather than once per row.
+_COMPACT_DTYPES: dict[Hashable, Any] = {
+    "repo_name": "category",
+    "commit_date": "category",
+    "commit_id": "category",
+    "filedir": "category",
+    "filename": "category",
+    "code_lines": "int32",
+    "docstring_lines": "int32",
+    "comment_lines": "int32",
+    "total_lines": "int32",
+    "documentation_lines": "int32",
+}
+
+# Rows read at a time when streaming a history file, or when only some commits
+# of a CSV file are wanted
+_CHUNK_ROWS = 1_000_000
+
+# Columns identifying a summary row: one per commit and filedir
+_SUMMARY_KEYS = ["repo_name", "commit_date", "commit_id", "filedir"]
+
+# Line count columns, summed into summary rows
+_LINE_COLUMNS = [
+    "code_lines",
+    "docstring_lines",
+    "comment_lines",
+    "total_lines",
+    "documentation_lines",
+]
+
+
+def _parse_commit_dates(timestamps: pd.Series) -> pd.Series:
+    """Parse ISO 8601 commit_date text into tz-aware datetimes, without inference.
+
+    Covers both Git's "YYYY-MM-DD HH:MM:SS +ZZZZ", as generate_csv writes it,
+    and "YYYY-MM-DDTHH:MM:SS+ZZ:ZZ" in hand-made files.
+
+    Keeps each commit's own UTC offset when the history uses a single offset;
+    mixed offsets (travel, daylight saving) are converted to UTC, as in
+    Parquet/Feather history files, since one column can only hold one timezone.
+    """
+    offsets = timestamps.str[-6:].to_numpy()  # " +ZZZZ" or "+ZZ:ZZ" suffix
+    single_offset = bool((offsets == offsets[:1]).all())
+    return pd.to_datetime(timestamps, format="ISO8601", utc=not single_offset)
+
+
+def _parse_categorical_commit_dates(commit_dates: pd.Series) -> pd.Series:
+    """Parse categorical commit_date text once per distinct timestamp.
+
+    Gives the same datetimes as _parse_commit_dates on the plain text.
+    """
+    categorical = commit_dates.cat
+    parsed = _parse_commit_dates(pd.Series(categorical.categories))
+    return pd.Series(
+        parsed.array.take(categorical.codes.to_numpy()), index=commit_dates.index
+    )
+
+
+def _compact_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a loaded history's columns to _COMPACT_DTYPES, in place.
+
+    Columns already of their compact type are left alone. commit_id's
+    categories are sorted, so sorting by it orders commits as their hashes do.
+    """
+    for column, dtype in _COMPACT_DTYPES.items():
+        if column != "commit_date" and column in df and df[column].dtype != dtype:
+            df[column] = df[column].astype(dtype)
+    if "commit_id" in df:
+        commit_ids = df["commit_id"].cat
+        df["commit_id"] = commit_ids.reorder_categories(sorted(commit_ids.categories))
+    return df
+
+
+def _load_csv(
+    csv_path: str, commit_ids: list[str] | None = None, *, compact: bool = False
+) -> pd.DataFrame:
+    """Load CSV history file containing Git commit metrics.
+
+    With commit_ids, only rows of those commits are kept, reading in chunks so
+    the rest of the file is never held in memory. With compact, columns are
+    read straight into _COMPACT_DTYPES, never as one string object per row.
+    """
+    dtypes = _COMPACT_DTYPES if compact else _CSV_DTYPES
     try:
-        df = pd.read_csv(
-            csv_path,
-            dtype={
-                "repo_name": str,
-                "commit_id": str,
-                "filedir": str,
-                "filename": str,
-                "code_lines": int,
-                "docstring_lines": int,
-                "comment_lines": int,
-                "total_lines": int,
-                "documentation_lines": int,
-            },
-        )
+        with profiling.stage("csv.load"):
+            if commit_ids is None:
+                df = pd.read_csv(csv_path, dtype=dtypes)
+            else:
+                chunks = pd.read_csv(csv_path, dtype=dtypes, chunksize=_CHUNK_ROWS)
+                # Chunks' categories differ, so their union is re-categorised below
+                df = pd.concat(
+                    chunk[chunk["commit_id"].isin(commit_ids)] for chunk in chunks
+                )
     except FileNotFoundError:
         print(f"❌  CSV file not found: {csv_path}")
         sys.exit(1)
     else:
-        # Parse datetime with timezone preservation
-        df["commit_date"] = pd.to_datetime(df["commit_date"])
-        return df
+        profiling.add_bytes("csv.load", Path(csv_path).stat().st_size)
+        if not compact:
+            df["commit_date"] = _parse_commit_dates(cast("pd.Series", df["commit_date"]))
+            return df
+        commit_dates = cast("pd.Series", df["commit_date"]).astype("category")
+        df["commit_date"] = _parse_categorical_commit_dates(commit_dates)
+        return _compact_types(df)
+
+
+def _load_columnar(
+    history_path: str, commit_ids: list[str] | None = None, *, compact: bool = False
+) -> pd.DataFrame:
+    """Load a Parquet or Feather history file, memory-mapped, with its stored dtypes.
+
+    commit_date is already a tz-aware timestamp, so no date parsing is needed.
+    With commit_ids, only rows of those commits are converted to pandas. With
+    compact, columns are converted to _COMPACT_DTYPES, commit_id being
+    dictionary-encoded before it reaches pandas.
+    """
+    try:
+        import pyarrow.compute  # noqa: PLC0415 (optional dependency)
+        import pyarrow.feather  # noqa: PLC0415 (optional dependency)
+        import pyarrow.parquet  # noqa: PLC0415 (optional dependency)
+    except ImportError:
+        print(
+            "❌  Reading Parquet/Feather needs pyarrow: pip install 'plot-py-repo[arrow]'"
+        )
+        sys.exit(1)
+
+    try:
+        with profiling.stage("columnar.load"):
+            if Path(history_path).suffix == ".feather":
+                table = pyarrow.feather.read_table(history_path, memory_map=True)
+            else:
+                table = pyarrow.parquet.read_table(history_path, memory_map=True)
+            if commit_ids is not None:
+                table = table.filter(pyarrow.compute.field("commit_id").isin(commit_ids))
+            if compact:
+                table = table.set_column(
+                    table.schema.get_field_index("commit_id"),
+                    "commit_id",
+                    table["commit_id"].dictionary_encode(),
+                )
+            df = table.to_pandas()
+    except FileNotFoundError:
+        print(f"❌  History file not found: {history_path}")
+        sys.exit(1)
+    else:
+        profiling.add_bytes("columnar.load", Path(history_path).stat().st_size)
+        return _compact_types(df) if compact else df
+
+
+def _load_history(
+    history_path: str, commit_ids: list[str] | None = None, *, compact: bool = False
+) -> pd.DataFrame:
+    """Load a history file written as CSV, Parquet or Feather (chosen by suffix).
+
+    Args:
+        history_path: History (or summary) file from generate_csv
+        commit_ids: Only load rows of these commits (default: all rows)
+        compact: Load into _COMPACT_DTYPES, several times smaller in memory than
+            string and int64 columns; the chart modules take either
+    """
+    if Path(history_path).suffix in {".parquet", ".feather"}:
+        return _load_columnar(history_path, commit_ids, compact=compact)
+    return _load_csv(history_path, commit_ids, compact=compact)
+
+
+def _iter_columnar_chunks(history_path: str) -> Iterator[pd.DataFrame]:
+    """Yield a Parquet or Feather history in chunks of _CHUNK_ROWS rows.
+
+    Parquet is decoded one batch at a time; Feather is memory-mapped and only
+    each slice is converted to pandas. commit_id is dictionary-encoded first.
+    """
+    try:
+        import pyarrow.feather  # noqa: PLC0415 (optional dependency)
+        import pyarrow.parquet  # noqa: PLC0415 (optional dependency)
+    except ImportError:
+        print(
+            "❌  Reading Parquet/Feather needs pyarrow: pip install 'plot-py-repo[arrow]'"
+        )
+        sys.exit(1)
+
+    try:
+        if Path(history_path).suffix == ".feather":
+            table = pyarrow.feather.read_table(history_path, memory_map=True)
+            batches = (
+                table.slice(offset, _CHUNK_ROWS)
+                for offset in range(0, table.num_rows, _CHUNK_ROWS)
+            )
+        else:
+            parquet_file = pyarrow.parquet.ParquetFile(history_path, memory_map=True)
+            batches = parquet_file.iter_batches(batch_size=_CHUNK_ROWS)
+    except FileNotFoundError:
+        print(f"❌  History file not found: {history_path}")
+        sys.exit(1)
+
+    for batch in batches:
+        commit_ids = batch.column("commit_id").dictionary_encode()
+        yield batch.set_column(
+            batch.schema.get_field_index("commit_id"), "commit_id", commit_ids
+        ).to_pandas()
+
+
+def _iter_history_chunks(history_path: str) -> Iterator[pd.DataFrame]:
+    """Yield a history file in chunks of _CHUNK_ROWS rows, in _COMPACT_DTYPES.
+
+    commit_date stays categorical text in CSV chunks; it is parsed once reduced.
+    """
+    if Path(history_path).suffix in {".parquet", ".feather"}:
+        for chunk in _iter_columnar_chunks(history_path):
+            yield _compact_types(chunk)
+        return
+    try:
+        chunks = pd.read_csv(history_path, dtype=_COMPACT_DTYPES, chunksize=_CHUNK_ROWS)
+    except FileNotFoundError:
+        print(f"❌  CSV file not found: {history_path}")
+        sys.exit(1)
+    with chunks:
+        for chunk in chunks:
+            yield _compact_types(chunk)
+
+
+def _reduce_history(history_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Stream a history file into per-commit filedir totals and the latest files.
+
+    Each chunk is reduced as soon as it is read, so only the totals (one row per
+    commit and filedir, as in a summary file) and the latest commit's rows are
+    ever held: the history itself need not fit in memory. Files in
+    EXCLUDED_FILENAMES are left out of both.
+
+    Returns:
+        Totals with the summary file's columns, and the rows of the latest
+        commit(s), with commit_date parsed as by _load_csv
+    """
+    partials: list[pd.DataFrame] = []
+    latest_chunks: list[pd.DataFrame] = []
+    latest_date: pd.Timestamp | None = None
+    with profiling.stage("history.reduce"):
+        for chunk in _iter_history_chunks(history_path):
+            rows = _exclude_filenames(chunk, EXCLUDED_FILENAMES)
+            if rows.empty:
+                continue
+            keys = [key for key in _SUMMARY_KEYS if key in rows]
+            line_columns = [column for column in _LINE_COLUMNS if column in rows]
+            partials.append(
+                cast(
+                    "pd.DataFrame",
+                    rows.groupby(keys, observed=True, sort=False)[line_columns].sum(),
+                )
+            )
+            # Text dates are compared as instants, whatever their UTC offsets
+            dates = cast("pd.Series", rows["commit_date"])
+            if isinstance(dates.dtype, pd.CategoricalDtype):
+                dates = _parse_categorical_commit_dates(dates)
+            chunk_latest = cast("pd.Timestamp", dates.max())
+            if latest_date is None or chunk_latest > latest_date:
+                latest_date, latest_chunks = chunk_latest, []
+            if chunk_latest == latest_date:
+                latest_chunks.append(cast("pd.DataFrame", rows[dates == latest_date]))
+    profiling.add_bytes("history.reduce", Path(history_path).stat().st_size)
+
+    if not partials:
+        print(f"❌  No rows to chart in {history_path}")
+        sys.exit(1)
+    # A commit's rows may span chunks, so the chunks' totals are summed again
+    key_levels = list(range(partials[0].index.nlevels))
+    totals = (
+        pd.concat(partials)
+        .groupby(level=key_levels, observed=True, sort=False)
+        .sum()
+        .reset_index()
+    )
+    latest = pd.concat(latest_chunks, ignore_index=True)
+    if not pd.api.types.is_datetime64_any_dtype(totals["commit_date"]):
+        # Parsed together, so both share one timezone as in a full load
+        commit_dates = pd.concat(
+            [totals["commit_date"], latest["commit_date"]], ignore_index=True
+        )
+        parsed = _parse_commit_dates(cast("pd.Series", commit_dates).astype(str))
+        totals["commit_date"] = parsed.array[: len(totals)]
+        latest["commit_date"] = parsed.array[len(totals) :]
+    return totals, latest
+
+
+def _summary_path(history_path: str) -> Path | None:
+    """Return the summary generate_csv wrote beside history_path, if up to date.
+
+    repo_history.<format> pairs with repo_summary.<format>. A summary older
+    than its history file (e.g. from an earlier run) is ignored.
+    """
+    history_file = Path(history_path)
+    if not history_file.stem.endswith("_history"):
+        return None
+    summary_file = history_file.with_name(
+        history_file.stem.removesuffix("_history") + "_summary" + history_file.suffix
+    )
+    if (
+        not summary_file.exists()
+        or summary_file.stat().st_mtime < history_file.stat().st_mtime
+    ):
+        return None
+    return summary_file
 
 
 def _exclude_filenames(df: pd.DataFrame, filenames: list[str]) -> pd.DataFrame:
     """Remove rows where filename matches any in the exclusion list."""
     mask = ~df["filename"].isin(filenames)
-    return df.loc[mask].copy()
+    return df.loc[mask]
+
 
+def _chart_data(history_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Load what the charts need: per-commit rows, and the latest commit's files.
 
-def create_charts(csv_path: str, output_dir: str) -> None:
-    """Create evolution and breakdown visualisation WebP images from CSV history."""
-    df = _load_csv(csv_path)
-    filtered_df = _exclude_filenames(df, ["__init__.py"])
+    Reads the summary generate_csv wrote beside the history when it is up to
+    date, else streams the history itself (see _reduce_history).
+    """
+    summary_path = _summary_path(history_path)
+    if summary_path is None:
+        # Stream the history, so it never has to fit in memory
+        return _reduce_history(history_path)
+    # Per-commit totals suffice for the evolution charts; only the breakdown
+    # needs per-file rows, and only those of the latest commit
+    chart_df = _load_history(str(summary_path), compact=True)
+    latest_date = chart_df["commit_date"].max()
+    latest_ids = chart_df.loc[chart_df["commit_date"] == latest_date, "commit_id"]
+    latest_df = _exclude_filenames(
+        _load_history(history_path, latest_ids.unique().tolist(), compact=True),
+        EXCLUDED_FILENAMES,
+    )
+    return chart_df, latest_df
 
+
+def create_charts(
+    history_path: str, output_dir: str, exporter: ChartExporter | None = None
+) -> None:
+    """Create evolution and breakdown visualisation WebP images from history file.
+
+    Args:
+        history_path: CSV, Parquet or Feather history file from generate_csv
+        output_dir: Directory where WebP images are written
+        exporter: Existing exporter to share one browser session across calls;
+            images are then written (and reported) by the time it closes
+    """
     output_path = Path(output_dir)
-    chart_evolution.create(filtered_df, output_path / "repo_evolution.webp")
-    chart_evolution_commit.create(filtered_df, output_path / "repo_evolution_commit.webp")
-    chart_breakdown.create(filtered_df, output_path / "repo_breakdown.webp")
+    # Browser start-up overlaps with loading the history, and each export with
+    # building the next figure
+    with nullcontext(exporter) if exporter is not None else ChartExporter() as charts:
+        chart_df, latest_df = _chart_data(history_path)
+
+        # Both evolution charts read the same per-commit totals, computed once
+        with profiling.stage("aggregate"):
+            totals = commit_category_totals(chart_df)
 
-    print(f"✅  Created {output_path / 'repo_evolution.webp'}")
-    print(f"✅  Created {output_path / 'repo_evolution_commit.webp'}")
-    print(f"✅  Created {output_path / 'repo_breakdown.webp'}")
+        with profiling.stage("charts.render"):
+            charts.submit(
+                chart_evolution.build(chart_df, totals),
+                output_path / "repo_evolution.webp",
+            )
+            charts.submit(
+                chart_evolution_commit.build(chart_df, totals),
+                output_path / "repo_evolution_commit.webp",
+            )
+            charts.submit(
+                chart_breakdown.build(latest_df), output_path / "repo_breakdown.webp"
+            )
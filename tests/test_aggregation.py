@@ -0,0 +1,55 @@
+"""Tests for aggregation module."""
+
+import pandas as pd
+
+from plot_py_repo.aggregation import (
+    CATEGORY_CODE_COMMENTS,
+    CATEGORY_SOURCE_CODE,
+    CATEGORY_TEST_CODE,
+    CATEGORY_UNCATEGORISED,
+    commit_category_totals,
+)
+
+
+def _per_file_rows() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "commit_date": pd.to_datetime(["2024-01-01T10:00:00+00:00"] * 4),
+            "commit_id": ["aaa", "aaa", "bbb", "bbb"],  # Same timestamp, two commits
+            "filedir": ["src", "tests", "src", "docs"],
+            "code_lines": [100, 40, 110, 5],
+            "documentation_lines": [10, 4, 11, 1],
+        }
+    )
+
+
+def test_totals_sum_each_commit_by_category() -> None:
+    """Each commit gets one row per category; same-timestamp commits stay apart."""
+    result = commit_category_totals(_per_file_rows())
+
+    totals = {
+        (commit_id, category): line_count
+        for commit_id, category, line_count in result[
+            ["commit_id", "category", "line_count"]
+        ].itertuples(index=False)
+    }
+    assert totals == {
+        ("aaa", CATEGORY_SOURCE_CODE): 100,
+        ("aaa", CATEGORY_TEST_CODE): 40,
+        ("aaa", CATEGORY_CODE_COMMENTS): 14,
+        ("bbb", CATEGORY_SOURCE_CODE): 110,
+        ("bbb", CATEGORY_UNCATEGORISED): 5,
+        ("bbb", CATEGORY_CODE_COMMENTS): 12,
+    }
+
+
+def test_categorical_columns_give_same_totals_without_unobserved_rows() -> None:
+    """Categorical inputs (Parquet/Feather loads) match plain string inputs."""
+    df = _per_file_rows()
+    categorical = df.astype({"commit_id": "category", "filedir": "category"})
+
+    result = commit_category_totals(categorical)
+
+    pd.testing.assert_frame_equal(
+        result.astype({"commit_id": str}), commit_category_totals(df)
+    )
@@ -0,0 +1,155 @@
+"""Tests for batch module."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from plot_py_repo.batch import read_repo_list, run_batch
+from plot_py_repo.git_history import OutputFormat
+
+
+def _run_git(command: list[str], repo_path: Path) -> str:
+    """Run git command in repo and return output."""
+    return subprocess.check_output(command, cwd=repo_path).decode().strip()  # noqa: S603
+
+
+def _create_repo(repo_path: Path, source: str) -> None:
+    """Create a Git repo with one committed file src/example.py."""
+    (repo_path / "src").mkdir(parents=True)
+    _run_git(["git", "init"], repo_path)
+    _run_git(["git", "config", "user.name", "Test User"], repo_path)
+    _run_git(["git", "config", "user.email", "test@example.com"], repo_path)
+    (repo_path / "src" / "example.py").write_text(source)
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Initial commit"], repo_path)
+
+
+def test_read_repo_list_skips_comments_and_resolves_relative_paths(
+    tmp_path: Path,
+) -> None:
+    """Blank and "#" lines are ignored; relative paths are relative to the list."""
+    list_file = tmp_path / "repos.txt"
+    list_file.write_text("# tracked repos\nalpha\n\n  /abs/beta  \n")
+
+    assert read_repo_list(list_file) == [str(tmp_path / "alpha"), "/abs/beta"]
+
+
+def test_run_batch_writes_per_repo_and_combined_histories(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Each repo gets its own output directory; failures are skipped and returned."""
+    _create_repo(tmp_path / "one" / "app", "x = 1\n")
+    _create_repo(tmp_path / "two" / "app", '"""Doc."""\ny = 2\n')
+    missing = str(tmp_path / "missing")
+    output_dir = tmp_path / "out"
+
+    failed = run_batch(
+        [str(tmp_path / "one" / "app"), missing, str(tmp_path / "two" / "app")],
+        str(output_dir),
+        jobs=2,
+        charts=False,
+    )
+
+    combined = (output_dir / "combined_history.csv").read_text().splitlines()
+    assert failed == [missing]
+    assert (output_dir / "app" / "repo_history.csv").exists()
+    assert (output_dir / "app-2" / "repo_history.csv").exists()
+    assert len(combined) == 3  # One header, one row per repo
+    assert combined[0].startswith("repo_name,commit_date")
+    assert "1 of 3 repositories failed" in capsys.readouterr().out
+
+
+def test_run_batch_reports_unexpected_errors_and_carries_on(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """An error analysing one repository is reported; the others still run."""
+    _create_repo(tmp_path / "broken", "x = 1\n")
+    _create_repo(tmp_path / "fine", "y = 2\n")
+    output_dir = tmp_path / "out"
+    (output_dir / "broken").mkdir(parents=True)
+    (output_dir / "broken" / "repo_history.sqlite").write_text("not a database")
+
+    failed = run_batch(
+        [str(tmp_path / "broken"), str(tmp_path / "fine")],
+        str(output_dir),
+        charts=False,
+    )
+
+    output = capsys.readouterr().out
+    assert failed == [str(tmp_path / "broken")]
+    assert f"❌  Could not analyse {tmp_path / 'broken'}" in output
+    assert (output_dir / "fine" / "repo_history.csv").exists()
+    assert len((output_dir / "combined_history.csv").read_text().splitlines()) == 2
+
+
+def test_run_batch_samples_and_filters_every_repository(tmp_path: Path) -> None:
+    """Sampling and include/exclude globs apply to each repository's analysis."""
+    repo_path = tmp_path / "app"
+    _create_repo(repo_path, "x = 1\n")
+    (repo_path / "src" / "vendored.py").write_text("y = 2\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Vendor"], repo_path)
+    output_dir = tmp_path / "out"
+
+    run_batch(
+        [str(repo_path)],
+        str(output_dir),
+        charts=False,
+        sampling=(1, None, 1),
+        path_filter=(("src/**/*.py",), ("**/vendored.py",)),
+    )
+
+    header, *rows = [
+        line.split(",")
+        for line in (output_dir / "app" / "repo_history.csv").read_text().splitlines()
+    ]
+    assert [row[header.index("filename")] for row in rows] == ["example.py"]
+    assert rows[0][header.index("commit_id")] == _run_git(
+        ["git", "rev-parse", "HEAD"], repo_path
+    )
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "feather"])
+def test_run_batch_combines_typed_histories_batch_by_batch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, output_format: OutputFormat
+) -> None:
+    """Typed histories with their own categories and timezones combine into one."""
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    # One row per batch, so every batch extends the shared dictionaries
+    monkeypatch.setattr("plot_py_repo.columnar._BATCH_ROWS", 1)
+    _create_repo(tmp_path / "one", "x = 1\n")
+    _create_repo(tmp_path / "two", '"""Doc."""\ny = 2\n')
+    (tmp_path / "two" / "src" / "other.py").write_text("z = 3\n")
+    _run_git(["git", "add", "."], tmp_path / "two")
+    _run_git(
+        ["git", "commit", "-m", "Add other", "--date", "2024-01-01T00:00:00+05:30"],
+        tmp_path / "two",
+    )
+    output_dir = tmp_path / "out"
+
+    run_batch(
+        [str(tmp_path / "one"), str(tmp_path / "two")],
+        str(output_dir),
+        output_format=output_format,
+        charts=False,
+    )
+
+    read = pd.read_parquet if output_format == "parquet" else pd.read_feather
+    combined = read(output_dir / f"combined_history.{output_format}")
+    expected = pd.concat(
+        [
+            read(output_dir / repo / f"repo_history.{output_format}")
+            for repo in ("one", "two")
+        ],
+        ignore_index=True,
+    )
+    assert isinstance(combined["filename"].dtype, pd.CategoricalDtype)
+    assert str(combined["commit_date"].dt.tz) == "UTC"
+    for df in (combined, expected):
+        df["commit_date"] = df["commit_date"].dt.tz_convert("UTC")
+    categories = {"repo_name": str, "filedir": str, "filename": str}
+    pd.testing.assert_frame_equal(
+        combined.astype(categories), expected.astype(categories)
+    )
@@ -0,0 +1,58 @@
+"""Tests for benchmark module."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from plot_py_repo.benchmark import build_synthetic_repo, parse_size, run_case
+
+
+def test_parse_size_reads_commits_files_lines() -> None:
+    """Sizes are given as COMMITSxFILESxLINES."""
+    assert parse_size("500x50x200") == (500, 50, 200)
+
+
+@pytest.mark.parametrize("size", ["500x50", "0x10x10", "axbxc"])
+def test_parse_size_rejects_malformed_sizes(size: str) -> None:
+    """Anything but three positive integers raises ValueError."""
+    with pytest.raises(ValueError, match="COMMITSxFILESxLINES"):
+        parse_size(size)
+
+
+def test_build_synthetic_repo_has_requested_shape(tmp_path: Path) -> None:
+    """Synthetic repo has the requested commits, files and lines per file."""
+    repo_path = tmp_path / "repo"
+
+    build_synthetic_repo(repo_path, commits=4, files=6, lines=25)
+
+    def git(*args: str) -> str:
+        return subprocess.check_output(["git", *args], cwd=repo_path, text=True)  # noqa: S603
+
+    assert git("rev-list", "--count", "HEAD").strip() == "4"
+    files = git("ls-tree", "-r", "--name-only", "HEAD").split()
+    assert len(files) == 6
+    assert {file.split("/")[0] for file in files} == {"src", "tests"}
+    assert len(git("show", f"HEAD:{files[0]}").splitlines()) == 25
+
+
+def test_run_case_reports_stage_times_rows_and_memory() -> None:
+    """A benchmark case reports every analysis stage plus throughput and peak RSS.
+
+    Stages are read from the profile of the one analysis run, so each is timed.
+    """
+    result = run_case((3, 2, 10), jobs=1, charts=False)
+
+    assert set(result["stages_sec"]) == {
+        "log",
+        "tree_walk",
+        "blob_read",
+        "classify",
+        "generate_csv",
+        "csv_write",
+    }
+    assert all(seconds > 0 for seconds in result["stages_sec"].values())
+    assert result["rows"] == 6  # 2 files x 3 commits
+    assert result["unique_blobs"] == 4  # Both files, then one rewrite per commit
+    assert result["rows_per_sec"] > 0
+    assert result["peak_rss_mb"] > 0
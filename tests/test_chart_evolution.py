@@ -5,14 +5,13 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
-from plot_py_repo.chart_evolution import (
+from plot_py_repo.aggregation import (
     CATEGORY_CODE_COMMENTS,
     CATEGORY_SOURCE_CODE,
     CATEGORY_TEST_CODE,
-    _calculate_category_order,
-    _prepare_data,
-    create,
+    commit_category_totals,
 )
+from plot_py_repo.chart_evolution import _calculate_category_order, _prepare_data, create
 
 
 # Chapter 1: Data Contract
@@ -28,7 +27,7 @@ def test_prepare_data_requires_essential_columns() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     assert "date" in result.columns
     assert "category" in result.columns
@@ -46,7 +45,7 @@ def test_prepare_data_fails_with_missing_required_columns() -> None:
     )
 
     with pytest.raises(KeyError):
-        _prepare_data(df)
+        _prepare_data(commit_category_totals(df))
 
 
 # Chapter 2: Data Transformation Pipeline
@@ -69,7 +68,7 @@ def test_prepare_data_filters_to_latest_commit_per_date() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     assert len(result) == 3
     categories = result["category"].tolist()
@@ -90,7 +89,7 @@ def test_prepare_data_categorises_files_by_directory() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     categories = result["category"].tolist()
     assert CATEGORY_SOURCE_CODE in categories
@@ -114,7 +113,7 @@ def test_prepare_data_uses_fail_loud_for_uncategorised_directories() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     # All code_lines entries should be categorised as UNCATEGORISED_DIR
     # Note: After groupby, docs+scripts get aggregated into single row
@@ -140,7 +139,7 @@ def test_prepare_data_aggregates_lines_by_category() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     assert result[result["category"] == CATEGORY_SOURCE_CODE]["line_count"].item() == 150
     assert result[result["category"] == CATEGORY_CODE_COMMENTS]["line_count"].item() == 20
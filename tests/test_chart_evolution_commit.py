@@ -5,10 +5,13 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
-from plot_py_repo.chart_evolution_commit import (
+from plot_py_repo.aggregation import (
     CATEGORY_CODE_COMMENTS,
     CATEGORY_SOURCE_CODE,
     CATEGORY_TEST_CODE,
+    commit_category_totals,
+)
+from plot_py_repo.chart_evolution_commit import (
     _calculate_category_order,
     _prepare_data,
     create,
@@ -29,7 +32,7 @@ def test_prepare_data_requires_essential_columns() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     assert "commit_index" in result.columns
     assert "category" in result.columns
@@ -47,7 +50,7 @@ def test_prepare_data_fails_with_missing_required_columns() -> None:
     )
 
     with pytest.raises(KeyError):
-        _prepare_data(df)
+        _prepare_data(commit_category_totals(df))
 
 
 # Chapter 2: Data Transformation Pipeline
@@ -70,7 +73,7 @@ def test_prepare_data_creates_commit_index_chronologically() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     # Check that commit_index values are 1, 2, 3
     commit_indices = sorted(result["commit_index"].unique())
@@ -104,7 +107,7 @@ def test_prepare_data_includes_all_commits() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     # Should have 3 unique commit indices
     unique_commits = result["commit_index"].nunique()
@@ -124,7 +127,7 @@ def test_prepare_data_categorises_files_by_directory() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     categories = result["category"].tolist()
     assert CATEGORY_SOURCE_CODE in categories
@@ -149,7 +152,7 @@ def test_prepare_data_uses_fail_loud_for_uncategorised_directories() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     # All code_lines entries should be categorised as UNCATEGORISED_DIR
     uncategorised_rows = result[result["category"] == "UNCATEGORISED_DIR"]
@@ -182,7 +185,7 @@ def test_prepare_data_aggregates_lines_by_commit_and_category() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     # Commit 1 (2024-01-01): 100 + 50 = 150 source, 13 + 7 = 20 comments
     commit_1 = result[result["commit_index"] == 1]
@@ -229,7 +232,7 @@ def test_prepare_data_handles_duplicate_timestamps_correctly() -> None:
         }
     )
 
-    result = _prepare_data(df)
+    result = _prepare_data(commit_category_totals(df))
 
     # Should have 2 unique commit indices (not 1!)
     unique_commits = result["commit_index"].nunique()
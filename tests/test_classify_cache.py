@@ -0,0 +1,53 @@
+"""Tests for classify_cache module."""
+
+from pathlib import Path
+
+import pytest
+
+from plot_py_repo import classify_cache
+from plot_py_repo.classify_cache import ClassificationCache, clear_cache
+
+
+def test_entries_persist_across_connections_until_cleared(tmp_path: Path) -> None:
+    """Line counts stored in one session are found by the next, until cleared."""
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        cache.put_many({"aaa": (1, 2, 3, 7)})
+
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        assert cache.get_many(["aaa", "missing"]) == {"aaa": (1, 2, 3, 7)}
+
+    clear_cache(tmp_path)
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        assert cache.get_many(["aaa"]) == {}
+
+
+def test_entries_from_another_classifier_version_are_dropped(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Counts stored by an earlier classifier are not returned after an upgrade."""
+    monkeypatch.setattr(classify_cache, "CLASSIFIER_VERSION", "tokens-1")
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        cache.put_many({"aaa": (1, 2, 3, 7)})
+
+    monkeypatch.setattr(classify_cache, "CLASSIFIER_VERSION", "tokens-2")
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        assert cache.get_many(["aaa"]) == {}
+        cache.put_many({"aaa": (0, 2, 4, 7)})
+
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        assert cache.get_many(["aaa"]) == {"aaa": (0, 2, 4, 7)}
+
+
+def test_outgrowing_max_size_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Over the limit, the oldest entries go while a recently read one stays."""
+    old_shas = [f"old{i:037d}" for i in range(1000)]
+    with ClassificationCache(tmp_path, max_mb=1) as cache:
+        cache.put_many(dict.fromkeys(old_shas, (0, 0, 1, 1)))
+        for batch in range(7):
+            if batch == 3:
+                cache.get_many(old_shas[:1])  # Used again, so no longer oldest
+            cache.put_many({f"new{batch}{i:036d}": (0, 0, 1, 1) for i in range(1000)})
+
+        assert (tmp_path / "classifications.sqlite").stat().st_size <= 1024 * 1024
+        assert list(cache.get_many(old_shas)) == old_shas[:1]
+        assert len(cache.get_many([f"new6{i:036d}" for i in range(1000)])) == 1000
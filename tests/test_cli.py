@@ -6,6 +6,12 @@ from pathlib import Path
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep the CLI's classification cache out of the real ~/.cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg_cache"))
+
+
 def run_cli(*args: str) -> tuple[str, int]:
     """Run plot-py-repo CLI and return output and exit code.
 
@@ -108,6 +114,36 @@ def test_csv_flag_generates_images_from_existing_csv(tmp_path: Path) -> None:
     assert (output_dir / "repo_breakdown.webp").exists()
 
 
+def test_no_charts_writes_history_without_loading_chart_libraries(
+    tmp_path: Path,
+) -> None:
+    """--no-charts writes the CSV without importing pandas, Plotly or Kaleido."""
+    repo_dir = tmp_path / "test_repo"
+    create_test_git_repo(repo_dir)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    script = (
+        "import sys\n"
+        "from plot_py_repo import cli\n"
+        f"sys.argv = ['plot-py-repo', {str(repo_dir)!r}, '--no-charts', "
+        f"'--output-dir', {str(output_dir)!r}]\n"
+        "cli.main()\n"
+        "print(sorted({'pandas', 'plotly', 'kaleido'} & sys.modules.keys()))\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        ["uv", "run", "python", "-c", script],
+        capture_output=True,
+        text=True,
+        timeout=30,
+        check=True,
+    )
+
+    assert result.stdout.splitlines()[-1] == "[]"
+    assert (output_dir / "repo_history.csv").exists()
+    assert not (output_dir / "repo_evolution.webp").exists()
+
+
 def test_nonexistent_repo_shows_clean_error() -> None:
     """Shows clean error message when repository path doesn't exist."""
     output, exit_code = run_cli("/path/that/does/not/exist")
@@ -126,3 +162,37 @@ def test_nonexistent_csv_shows_clean_error() -> None:
     assert "❌  CSV file not found: does_not_exist.csv" in output
     assert "Traceback" not in output
     assert "FileNotFoundError" not in output
+
+
+def test_batch_missing_repo_list_shows_clean_error() -> None:
+    """Batch mode reports a missing repository list without a traceback."""
+    output, exit_code = run_cli("batch", "no_such_repos.txt")
+
+    assert exit_code == 1
+    assert "❌  Repository list not found: no_such_repos.txt" in output
+    assert "Traceback" not in output
+
+
+def test_batch_exits_with_error_when_any_repository_fails(tmp_path: Path) -> None:
+    """Batch mode analyses the other repositories, then exits non-zero."""
+    create_test_git_repo(tmp_path / "test_repo")
+    repo_list = tmp_path / "repos.txt"
+    repo_list.write_text("test_repo\nmissing\n")
+    output_dir = tmp_path / "output"
+
+    output, exit_code = run_cli(
+        "batch",
+        str(repo_list),
+        "--output-dir",
+        str(output_dir),
+        "--no-charts",
+        "--per",
+        "week",
+        "--git-concurrency",
+        "2",
+    )
+
+    assert exit_code == 1
+    assert (output_dir / "test_repo" / "repo_history.csv").exists()
+    assert "1 of 2 repositories failed" in output
+    assert "Traceback" not in output
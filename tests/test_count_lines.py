@@ -1,6 +1,11 @@
 """Tests for count_lines module."""
 
-from plot_py_repo.count_lines import classify_lines
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from plot_py_repo import count_lines
+from plot_py_repo.count_lines import POOL_CONTEXT, Engine, classify_lines, classify_many
 
 
 def _assert_count(category: str, expected: int, actual: int) -> None:
@@ -9,13 +14,13 @@ def _assert_count(category: str, expected: int, actual: int) -> None:
 
 
 class TestDocstringClassification:
-    """Tests for AST-based docstring detection."""
+    """Tests for docstring detection."""
 
     def test_single_line_module_docstring_counts_as_docstring(self) -> None:
         """Triple-quoted string at module level counts as docstring."""
         content = '"""Module docstring."""\n'
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 1, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -30,7 +35,7 @@ Line 3 of 5 - blank lines and closing empty delimiter count!.
 """
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 5, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -43,7 +48,7 @@ Line 3 of 5 - blank lines and closing empty delimiter count!.
     pass
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 1, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -56,7 +61,7 @@ Line 3 of 5 - blank lines and closing empty delimiter count!.
     pass # inline comments count as code, not as comment lines
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 1, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -69,7 +74,7 @@ Line 3 of 5 - blank lines and closing empty delimiter count!.
     pass
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 1, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -85,7 +90,7 @@ Line 3 of 5 - blank lines and closing empty delimiter count!.
     pass
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 2, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -100,7 +105,7 @@ class TestDocstringExclusions:
         content = '''x = """This is a string literal"""
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -114,7 +119,7 @@ Code Line 2
 Code Line 4 # not a comment"""
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -128,7 +133,7 @@ class TestCommentClassification:
         """Comment-only lines count as comments, blank line counts as code."""
         content = "# This is a comment\n\n  # This is a second comment"
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 2, comments_cnt)
@@ -138,7 +143,7 @@ class TestCommentClassification:
         """Line with inline comment is counted as code, not as a comment."""
         content = "x = 1  # inline comment\n"
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -154,7 +159,7 @@ class TestCodeLinesClassification:
     print(i)
 """
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -167,7 +172,7 @@ def foo():
     pass
 """
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -181,7 +186,7 @@ class TestBlankLineHandling:
         """Single blank line counts as code."""
         content = "\n"
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -191,7 +196,7 @@ class TestBlankLineHandling:
         """Blank lines between code count as code."""
         content = "\n\nx = 1\n\n\ny = 2\n\n"
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -207,7 +212,7 @@ print("line 4 of 6")
 print("line 6 of 6")
 """
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         # 6 total lines: 3 print statements + 3 blank lines
         _assert_count("docstring line(s)", 0, docstrings_cnt)
@@ -222,7 +227,7 @@ class TestEdgeCasesAndErrorHandling:
         """Empty content returns zero counts."""
         content = ""
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -235,7 +240,7 @@ class TestEdgeCasesAndErrorHandling:
 print("test")
 """
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -248,7 +253,7 @@ print("test")
 print("test")
 """
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -258,7 +263,7 @@ print("test")
         """Content without trailing newline is handled correctly."""
         content = "x = 1"
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, *_ = classify_lines(content)
 
         _assert_count("docstring line(s)", 0, docstrings_cnt)
         _assert_count("comment line(s)", 0, comments_cnt)
@@ -312,7 +317,8 @@ String literal (not docstring) line 3 of 5
 # Comment line 3 (final)
 '''
 
-        docstrings_cnt, comments_cnt, code_cnt = classify_lines(content)
+        result = classify_lines(content)
+        docstrings_cnt, comments_cnt, code_cnt, blank_cnt, total_lines = result
 
         # Expected breakdown:
         # - Docstrings: 9 (module:4 + function:1 + nested:1 + class:3)
@@ -323,9 +329,10 @@ String literal (not docstring) line 3 of 5
         _assert_count("docstring line(s)", 9, docstrings_cnt)
         _assert_count("comment line(s)", 3, comments_cnt)
         _assert_count("code line(s)", 28, code_cnt)
+        _assert_count("blank line(s)", 11, blank_cnt)
 
         # Verify total line count in content
-        total_lines = len(content.splitlines())
+        assert total_lines == len(content.splitlines())
         assert total_lines == 40, f"Expected 40 total lines in content, got {total_lines}"
 
         # Verify equation: docstrings + comments + code = total
@@ -333,3 +340,154 @@ String literal (not docstring) line 3 of 5
         assert sum_counts == total_lines, (
             f"Expected sum {sum_counts} to equal total {total_lines}"
         )
+
+
+class TestLineTotals:
+    """Tests for the blank and total line counts of a classification."""
+
+    @pytest.mark.parametrize("engine", ["tokens", "ast"])
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "",
+            "x = 1",
+            "x = 1\n\n\ny = 2\n",
+            "x = 1\r\n\r\ny = 2\r\n",
+            "x = 1\ry = 2\r",
+            'x = 1\n"""Form\x0cfeed."""\n',
+            "if x:\n        a = 1\n\n    b = 2\n",
+        ],
+    )
+    def test_totals_match_splitlines(self, content: str, engine: Engine) -> None:
+        """Totals match the file's splitlines(), blank lines being those left empty."""
+        lines = content.splitlines()
+        result = classify_lines(content, engine=engine)
+
+        assert result.total_lines == len(lines)
+        assert result.blank_lines == sum(not line.strip() for line in lines)
+        assert result.total_lines == sum(result[:3])
+
+
+def _fail_decode(source: bytes) -> str:
+    """Stand in for _decode_source where sources should never be decoded."""
+    msg = f"decoded {source!r}"
+    raise AssertionError(msg)
+
+
+class TestBytesSource:
+    """Tests for classifying raw bytes, as read from Git."""
+
+    @pytest.mark.parametrize("engine", ["tokens", "ast"])
+    @pytest.mark.parametrize(
+        "source",
+        [
+            b"",
+            b'"""Doc."""\n\n# c\nx = 1',
+            b'"""Invalid \xff UTF-8."""\nx = 1\n',
+            b"\xff",
+            b'x = "caf\xc3\xa9"\r\n# c\r\n',
+            b'x = "\xe2\x80\xa8"\n',
+            b'x = "\xc2\x85"\ny = 2\n',
+            b"x = 1\ry = 2\r\n",
+            b"def f(:\n\n",
+        ],
+    )
+    def test_bytes_match_utf8_text(self, source: bytes, engine: Engine) -> None:
+        """Bytes classify like their UTF-8 text, undecodable bytes dropped."""
+        text = source.decode("utf-8", errors="ignore")
+
+        assert classify_lines(source, engine=engine) == classify_lines(text, engine)
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            b'"""Doc."""\r\n\r\n# c\r\nx = 1\r\n',
+            b'"""Doc."""\r\n# c\r\nx = 1',
+            b'def f():\n    """Doc."""\n    # Last line, unterminated',
+            b'x = """Multi-line\r\nstring"""',
+            b'"""\xc3\x85ngstr\xc3\xb6m."""\nx = "\xd1\x85"\n',
+        ],
+    )
+    def test_crlf_unterminated_and_non_ascii_sources_are_not_decoded(
+        self, source: bytes, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """CRLF, a missing final newline and non-ASCII UTF-8 stay on the bytes path.
+
+        Bytes of UTF-8 characters such as "Å" are not taken for NEL line breaks.
+        """
+        text = source.decode()
+        monkeypatch.setattr(count_lines, "_decode_source", _fail_decode)
+
+        assert classify_lines(source) == classify_lines(text)
+
+    @pytest.mark.parametrize("engine", ["tokens", "ast"])
+    @pytest.mark.parametrize(
+        ("source", "encoding"),
+        [
+            (b'# -*- coding: latin-1 -*-\n"""Caf\xe9\x85."""\n', "latin-1"),
+            (b'\xef\xbb\xbf"""BOM then doc."""\n', "utf-8-sig"),
+            (b'# coding: cp1252\n"""Wait\x85 what."""\n', "cp1252"),
+        ],
+    )
+    def test_encoding_declaration_is_honoured(
+        self, source: bytes, encoding: str, engine: Engine
+    ) -> None:
+        """Bytes are decoded as their coding cookie or BOM says."""
+        expected = classify_lines(source.decode(encoding), engine=engine)
+
+        assert classify_lines(source, engine=engine) == expected
+        assert expected.docstring_lines == 1
+
+
+class TestClassifyMany:
+    """Tests for batch classification, serial and parallel."""
+
+    def test_process_pool_matches_serial_results_in_order(self) -> None:
+        """Pool results equal per-file classify_lines results, in input order."""
+        contents = ['"""Doc."""\n', "# c\nx = 1\n", "", "def f(:\n", "y = 2\n" * 40]
+        contents += [content.encode() for content in contents]
+
+        with ProcessPoolExecutor(max_workers=2, mp_context=POOL_CONTEXT) as executor:
+            parallel = classify_many(contents, executor)
+
+        assert parallel == [classify_lines(content) for content in contents]
+        assert classify_many(contents) == parallel
+
+
+class TestEngineEquivalence:
+    """Tests that the single-pass "tokens" engine matches the "ast" engine."""
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            '"""Doc."""\nx = 1\n',
+            '# Header comment\n\n"""Doc after comment."""\n',
+            '("""Parenthesised\ndocstring.""")\n',
+            '"Implicit" \\\n"concatenation"\n',
+            '"""Doc."""; x = 1\n',
+            'def f(): "Same-line docstring"; return 1\n',
+            'def f(x: int = (1, 2)) -> dict[str, int]:\n    # c\n    """Doc."""\n',
+            'class A(B, metaclass=M):\n\n    """Doc."""\n    x = 1\n',
+            'async def f():\n    """Doc."""\n',
+            'def f():\n    x = 1\n    """Not first statement."""\n',
+            'b"""Bytes are not docstrings."""\n',
+            'f"""F-strings are not docstrings."""\n',
+            '"""Not a docstring""".strip()\n',
+            '"""Tuple""", 1\n',
+            'if x:\n    """Not a def body."""\n',
+            'x = lambda: "not a docstring"\n',
+            'class A: pass\n"""Second statement."""\n',
+        ],
+    )
+    def test_tokens_engine_matches_ast_engine(self, content: str) -> None:
+        """Both engines classify valid Python identically."""
+        assert classify_lines(content, engine="tokens") == classify_lines(
+            content, engine="ast"
+        )
+
+    @pytest.mark.parametrize("engine", ["tokens", "ast"])
+    def test_inconsistent_dedent_counts_all_lines_as_code(self, engine: Engine) -> None:
+        """Tokeniser IndentationError falls back to code instead of crashing."""
+        content = "if x:\n        a = 1\n    b = 2\n"
+
+        assert classify_lines(content, engine=engine) == (0, 0, 3, 0, 3)
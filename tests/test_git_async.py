@@ -0,0 +1,25 @@
+"""Tests for git_async module."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from plot_py_repo.git_async import read_blobs
+
+
+def test_read_blobs_without_blobs_starts_no_process(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An empty request returns at once rather than forking `git cat-file`."""
+
+    async def no_subprocess(*_args: object, **_kwargs: object) -> None:
+        msg = "started a subprocess"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", no_subprocess)
+
+    async def read() -> dict[str, bytes | None]:
+        return await read_blobs(str(tmp_path), [], asyncio.Semaphore(4), readers=4)
+
+    assert asyncio.run(read()) == {}
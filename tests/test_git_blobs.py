@@ -0,0 +1,54 @@
+"""Tests for git_blobs module."""
+
+import subprocess
+from pathlib import Path
+
+from plot_py_repo.git_blobs import BlobReader
+
+
+def _run_git(command: list[str], repo_path: Path) -> str:
+    """Run git command in repo and return output."""
+    return subprocess.check_output(command, cwd=repo_path).decode().strip()  # noqa: S603
+
+
+def _create_repo_with_blobs(
+    tmp_path: Path, contents: list[bytes]
+) -> tuple[Path, list[str]]:
+    """Create a Git repo storing one blob per content, returning the blob SHAs."""
+    repo_path = tmp_path / "test_repo"
+    repo_path.mkdir()
+    _run_git(["git", "init"], repo_path)
+    _run_git(["git", "config", "user.name", "Test User"], repo_path)
+    _run_git(["git", "config", "user.email", "test@example.com"], repo_path)
+
+    blob_shas = []
+    for i, content in enumerate(contents):
+        file_path = repo_path / f"file_{i}.py"
+        file_path.write_bytes(content)
+        blob_shas.append(
+            _run_git(["git", "hash-object", "-w", file_path.name], repo_path)
+        )
+    return repo_path, blob_shas
+
+
+def test_read_returns_exact_contents_for_many_blobs(tmp_path: Path) -> None:
+    """Consecutive reads through one process return each blob byte-for-byte."""
+    contents = [b"x = 1\n", b"", b"no trailing newline", b"# \xc3\xa9\n\n\n"]
+    repo_path, blob_shas = _create_repo_with_blobs(tmp_path, contents)
+
+    with BlobReader(str(repo_path)) as reader:
+        results = [reader.read(sha) for sha in blob_shas]
+
+    assert results == contents
+
+
+def test_read_returns_none_for_missing_object(tmp_path: Path) -> None:
+    """Unknown SHAs return None and leave the reader usable."""
+    repo_path, blob_shas = _create_repo_with_blobs(tmp_path, [b"y = 2\n"])
+
+    with BlobReader(str(repo_path)) as reader:
+        missing = reader.read("0" * 40)
+        found = reader.read(blob_shas[0])
+
+    assert missing is None
+    assert found == b"y = 2\n"
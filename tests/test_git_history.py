@@ -1,9 +1,24 @@
 """Tests for git_history module."""
 
+import os
 import subprocess
+from collections.abc import Iterator
 from pathlib import Path
 
-from plot_py_repo.git_history import generate_csv
+import pandas as pd
+import pytest
+
+from plot_py_repo import git_history, profiling
+from plot_py_repo.classify_cache import ClassificationCache
+from plot_py_repo.git_history import (
+    OutputFormat,
+    _Batch,
+    _read_ahead,
+    _tree_changes,
+    generate_csv,
+)
+from plot_py_repo.pathspecs import DEFAULT_PATH_FILTER, to_pathspecs
+from plot_py_repo.visualise import _load_history
 
 
 def _run_git(command: list[str], repo_path: Path) -> str:
@@ -110,3 +125,359 @@ def test_csv_derived_columns_calculated_correctly(tmp_path: Path) -> None:
         f"code_lines ({code_lines}) + docstring_lines ({docstring_lines}) + "
         f"comment_lines ({comment_lines})"
     )
+
+
+def test_unchanged_files_are_classified_once_across_commits(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Blob SHA cache classifies an unchanged file once, yet still writes every row."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (repo_path / "tests").mkdir()
+    (repo_path / "tests" / "test_example.py").write_text("def test_x():\n    pass\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add test"], repo_path)
+
+    csv_path = generate_csv(str(repo_path), str(tmp_path))
+
+    rows = Path(csv_path).read_text().splitlines()[1:]
+    assert len(rows) == 3  # example.py in both commits + test_example.py
+    assert "2 unique file versions classified" in capsys.readouterr().out
+
+
+def test_rows_follow_additions_modifications_and_deletions(tmp_path: Path) -> None:
+    """Diff-driven traversal reports each commit's files as they were at that commit."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (repo_path / "src" / "other.py").write_text("x = 1\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add other"], repo_path)
+    (repo_path / "src" / "example.py").write_text("def hello():\n    return 1\n\n")
+    (repo_path / "src" / "other.py").unlink()
+    _run_git(["git", "add", "-A"], repo_path)
+    _run_git(["git", "commit", "-m", "Modify example, delete other"], repo_path)
+    commit_ids = _run_git(["git", "log", "--format=%H"], repo_path).split()
+
+    csv_path = generate_csv(str(repo_path), str(tmp_path))
+
+    files_per_commit: dict[str, set[tuple[str, str]]] = {}
+    header, *rows = [line.split(",") for line in Path(csv_path).read_text().splitlines()]
+    for row in rows:
+        commit_files = files_per_commit.setdefault(row[header.index("commit_id")], set())
+        commit_files.add(
+            (row[header.index("filename")], row[header.index("total_lines")])
+        )
+    assert files_per_commit == {
+        commit_ids[2]: {("example.py", "2")},
+        commit_ids[1]: {("example.py", "2"), ("other.py", "1")},
+        commit_ids[0]: {("example.py", "3")},
+    }
+
+
+@pytest.mark.parametrize("git_concurrency", [1, 4])
+def test_rows_match_each_commit_tree_across_branches_and_merges(
+    tmp_path: Path, git_concurrency: int
+) -> None:
+    """Replaying the logged changes gives each commit's tree, merges included."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    _run_git(["git", "checkout", "-b", "side"], repo_path)
+    (repo_path / "src" / "side.py").write_text("x = 1\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add side"], repo_path)
+    _run_git(["git", "checkout", "-"], repo_path)
+    (repo_path / "src" / "main.py").write_text("y = 1\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add main"], repo_path)
+    _run_git(["git", "merge", "--no-edit", "side"], repo_path)
+    (repo_path / "src" / "side.py").unlink()
+    _run_git(["git", "commit", "-am", "Remove side"], repo_path)
+
+    csv_path = generate_csv(
+        str(repo_path), str(tmp_path), git_concurrency=git_concurrency
+    )
+
+    files_per_commit: dict[str, set[str]] = {}
+    header, *rows = [line.split(",") for line in Path(csv_path).read_text().splitlines()]
+    for row in rows:
+        commit_files = files_per_commit.setdefault(row[header.index("commit_id")], set())
+        commit_files.add(row[header.index("filename")])
+    assert files_per_commit == {
+        commit_id: {
+            Path(file_path).name
+            for file_path in _run_git(
+                ["git", "ls-tree", "-r", "--name-only", commit_id], repo_path
+            ).split()
+        }
+        for commit_id in _run_git(["git", "log", "--format=%H"], repo_path).split()
+    }
+
+
+def test_paths_git_would_quote_keep_their_names(tmp_path: Path) -> None:
+    """Non-ASCII, quoted and non-UTF-8 paths are read unquoted from Git."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    names = ["café.py", 'a"b.py', os.fsdecode(b"bad\xff.py")]
+    for name in names:
+        (repo_path / "src" / name).write_text("x = 1\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add odd names"], repo_path)
+    head = _run_git(["git", "rev-parse", "HEAD"], repo_path)
+
+    tree_changes = _tree_changes(
+        str(repo_path), None, head, to_pathspecs(DEFAULT_PATH_FILTER)
+    )
+    history_path = generate_csv(str(repo_path), str(tmp_path), output_format="parquet")
+
+    assert {file_path for file_path, _ in tree_changes} == {
+        f"src/{name}" for name in ["example.py", *names]
+    }
+    assert _files_per_commit(history_path)[head] == {
+        ("src", name) for name in ["example.py", "café.py", 'a"b.py', "bad\ufffd.py"]
+    }
+
+
+@pytest.mark.parametrize(
+    ("jobs", "git_concurrency"), [(2, 1), (1, 4)], ids=["jobs", "git_concurrency"]
+)
+def test_parallel_runs_write_identical_csv_to_serial(
+    tmp_path: Path, jobs: int, git_concurrency: int
+) -> None:
+    """A process pool or concurrent Git processes give byte-identical output."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (repo_path / "tests").mkdir()
+    for i in range(3):
+        (repo_path / "tests" / f"test_{i}.py").write_text(
+            f'"""Test {i}."""\n# c\nx = {i}\n'
+        )
+        _run_git(["git", "add", "."], repo_path)
+        _run_git(["git", "commit", "-m", f"Add test {i}"], repo_path)
+    (tmp_path / "serial").mkdir()
+    (tmp_path / "parallel").mkdir()
+
+    serial_csv = generate_csv(str(repo_path), str(tmp_path / "serial"))
+    parallel_csv = generate_csv(
+        str(repo_path),
+        str(tmp_path / "parallel"),
+        jobs=jobs,
+        git_concurrency=git_concurrency,
+    )
+
+    assert Path(parallel_csv).read_text() == Path(serial_csv).read_text()
+
+
+def test_rerun_analyses_only_new_commits_and_matches_fresh_run(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """History store reuses analysed commits; the CSV still covers all commits."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (tmp_path / "incremental").mkdir()
+    (tmp_path / "fresh").mkdir()
+    generate_csv(str(repo_path), str(tmp_path / "incremental"))
+    (repo_path / "src" / "example.py").write_text("x = 1\n")
+    _run_git(["git", "commit", "-am", "Change example"], repo_path)
+    capsys.readouterr()
+
+    incremental_csv = generate_csv(str(repo_path), str(tmp_path / "incremental"))
+    output = capsys.readouterr().out
+    fresh_csv = generate_csv(str(repo_path), str(tmp_path / "fresh"))
+
+    assert "2 commits analyzed (1 reused from repo_history.sqlite)" in output
+    assert "1 unique file versions classified" in output
+    assert Path(incremental_csv).read_text() == Path(fresh_csv).read_text()
+
+
+def _files_per_commit(csv_path: str) -> dict[str, set[tuple[str, str]]]:
+    """Map each commit_id in a history file to its (filedir, filename) pairs."""
+    history = _load_history(csv_path)
+    return {
+        str(commit_id): set(zip(group["filedir"], group["filename"], strict=True))
+        for commit_id, group in history.groupby("commit_id")
+    }
+
+
+@pytest.mark.parametrize("git_concurrency", [1, 4])
+def test_include_and_exclude_globs_choose_the_analysed_files(
+    tmp_path: Path, git_concurrency: int
+) -> None:
+    """Only files matching an include glob and no exclude glob get rows."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    for file_path in ["src/__init__.py", "pkg/core.py", "pkg/migrations/m1.py"]:
+        (repo_path / file_path).parent.mkdir(exist_ok=True)
+        (repo_path / file_path).write_text("x = 1\n")
+    (repo_path / "setup.py").write_text("x = 1\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add files"], repo_path)
+    (tmp_path / "default").mkdir()
+    (tmp_path / "custom").mkdir()
+
+    default_csv = generate_csv(
+        str(repo_path), str(tmp_path / "default"), git_concurrency=git_concurrency
+    )
+    custom_csv = generate_csv(
+        str(repo_path),
+        str(tmp_path / "custom"),
+        git_concurrency=git_concurrency,
+        path_filter=(("pkg/**/*.py", "*.py"), ("**/migrations/**",)),
+    )
+
+    latest = _run_git(["git", "rev-parse", "HEAD"], repo_path)
+    assert _files_per_commit(default_csv)[latest] == {("src", "example.py")}
+    assert _files_per_commit(custom_csv) == {
+        latest: {("pkg", "core.py"), (".", "setup.py")}
+    }
+
+
+def test_rerun_with_other_globs_analyses_every_commit_afresh(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Commits stored under other globs are not reused for a new path filter."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (repo_path / "tests").mkdir()
+    (repo_path / "tests" / "test_example.py").write_text("x = 1\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add test"], repo_path)
+    generate_csv(str(repo_path), str(tmp_path))
+    capsys.readouterr()
+
+    csv_path = generate_csv(
+        str(repo_path), str(tmp_path), path_filter=(("tests/**/*.py",), ())
+    )
+
+    assert "reused" not in capsys.readouterr().out
+    assert {
+        filedir for files in _files_per_commit(csv_path).values() for filedir, _ in files
+    } == {"tests"}
+
+
+def test_rerun_after_classifier_upgrade_analyses_every_commit_afresh(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Commits stored by an earlier classifier version are not reused."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    monkeypatch.setattr(git_history, "CLASSIFIER_VERSION", "tokens-1")
+    generate_csv(str(repo_path), str(tmp_path))
+    capsys.readouterr()
+
+    monkeypatch.setattr(git_history, "CLASSIFIER_VERSION", "tokens-2")
+    generate_csv(str(repo_path), str(tmp_path))
+
+    assert "reused" not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "feather"])
+def test_columnar_output_matches_csv_with_native_types(
+    tmp_path: Path, output_format: OutputFormat, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Parquet/Feather hold the CSV's rows with categorical and tz-aware columns."""
+    pytest.importorskip("pyarrow")
+    # Stream rows in several batches, so dictionaries grow between batches
+    monkeypatch.setattr("plot_py_repo.columnar._BATCH_ROWS", 2)
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (repo_path / "tests").mkdir()
+    (repo_path / "tests" / "test_example.py").write_text('"""Doc."""\nx = 1\n')
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add test"], repo_path)
+
+    csv_df = _load_history(generate_csv(str(repo_path), str(tmp_path)))
+    columnar_path = generate_csv(
+        str(repo_path), str(tmp_path), output_format=output_format
+    )
+    columnar_df = _load_history(columnar_path)
+
+    assert columnar_path.endswith(f"repo_history.{output_format}")
+    assert isinstance(columnar_df["filename"].dtype, pd.CategoricalDtype)
+    assert isinstance(columnar_df["commit_date"].dtype, pd.DatetimeTZDtype)
+    pd.testing.assert_frame_equal(
+        columnar_df.astype({"repo_name": str, "filedir": str, "filename": str}),
+        csv_df,
+        check_dtype=False,
+    )
+
+
+def test_profiled_run_times_streamed_commit_listing(tmp_path: Path) -> None:
+    """The commit listing read while analysing is reported as the git.log stage."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    profiling.enable()
+    try:
+        generate_csv(str(repo_path), str(tmp_path))
+        summary = profiling.summary()
+    finally:
+        profiling.disable()
+
+    stage_row = next(line for line in summary.splitlines() if "git.log " in line)
+    # stage, calls, total s, mean ms, then MB and MB/s read from the pipe
+    assert len(stage_row.split()) == 6
+
+
+def test_read_ahead_keeps_order_and_reraises_reader_errors() -> None:
+    """Batches arrive in order, then an error raised while reading surfaces."""
+
+    def batches() -> Iterator[_Batch]:
+        for index in range(10):
+            yield [(f"c{index}", 1704067200, 0)], [], {}, {}
+        msg = "git failed"
+        raise RuntimeError(msg)
+
+    received = []
+    with pytest.raises(RuntimeError, match="git failed"):
+        received.extend(batch[0][0][0] for batch in _read_ahead(batches()))
+
+    assert received == [f"c{index}" for index in range(10)]
+
+
+def test_summary_totals_each_filedir_per_commit_without_init_files(
+    tmp_path: Path,
+) -> None:
+    """repo_summary holds per-commit filedir totals of the history, minus __init__.py."""
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (repo_path / "src" / "__init__.py").write_text("x = 1\n")
+    (repo_path / "src" / "other.py").write_text("y = 2\n# c\n")
+    _run_git(["git", "add", "."], repo_path)
+    _run_git(["git", "commit", "-m", "Add files"], repo_path)
+
+    history = _load_history(generate_csv(str(repo_path), str(tmp_path)))
+    summary = _load_history(str(tmp_path / "repo_summary.csv"))
+
+    charted = history[history["filename"] != "__init__.py"]
+    expected = charted.groupby(["commit_id", "filedir"], as_index=False)[
+        ["code_lines", "comment_lines", "total_lines", "documentation_lines"]
+    ].sum()
+    assert len(summary) == 2  # One filedir at each of two commits
+    pd.testing.assert_frame_equal(
+        summary[expected.columns].set_index("commit_id").sort_index(),
+        expected.set_index("commit_id").sort_index(),
+    )
+
+
+@pytest.mark.parametrize("git_concurrency", [1, 4])
+def test_classification_cache_is_reused_by_other_output_dirs(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], git_concurrency: int
+) -> None:
+    """A second analysis elsewhere takes every line count from the shared cache.
+
+    Cached blobs are looked up before reading, so none is read from Git again.
+    """
+    repo_path = _create_test_repo_with_commit(tmp_path)
+    (tmp_path / "first").mkdir()
+    (tmp_path / "second").mkdir()
+
+    with ClassificationCache(tmp_path / "cache", max_mb=1) as cache:
+        first_csv = generate_csv(
+            str(repo_path),
+            str(tmp_path / "first"),
+            git_concurrency=git_concurrency,
+            cache=cache,
+        )
+        capsys.readouterr()
+        profiling.enable()
+        try:
+            second_csv = generate_csv(
+                str(repo_path),
+                str(tmp_path / "second"),
+                git_concurrency=git_concurrency,
+                cache=cache,
+            )
+            summary = profiling.summary()
+        finally:
+            profiling.disable()
+
+    assert "(1 from classification cache)" in capsys.readouterr().out
+    assert Path(second_csv).read_text() == Path(first_csv).read_text()
+    assert "git.blob_read" not in summary
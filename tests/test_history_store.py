@@ -0,0 +1,52 @@
+"""Tests for history_store module."""
+
+from pathlib import Path
+
+from plot_py_repo.history_store import HistoryStore
+
+
+def test_added_commits_persist_across_connections(tmp_path: Path) -> None:
+    """Commits recorded in one session are known to the next, even without files."""
+    db_path = tmp_path / "history.sqlite"
+
+    with HistoryStore(db_path) as store:
+        store.add_commits([("aaa", [("src", "a.py", 3, 1, 1, 5)]), ("bbb", [])])
+
+    with HistoryStore(db_path) as store:
+        assert store.analysed_commit_ids() == {"aaa", "bbb"}
+
+
+def test_export_rows_follow_queued_commit_order(tmp_path: Path) -> None:
+    """Rows come back grouped in the queued commit order, skipping unknown ones."""
+    with HistoryStore(tmp_path / "history.sqlite") as store:
+        store.add_commits(
+            [
+                ("old", [("src", "a.py", 1, 0, 0, 1)]),
+                ("new", [("src", "a.py", 2, 0, 0, 2), ("tests", "t.py", 4, 0, 0, 4)]),
+            ]
+        )
+
+        store.add_export_commits([("new", 20, 60), ("missing", 30, 0)])
+        store.add_export_commits([("old", 10, -300)])
+
+        rows = list(store.iter_export_rows())
+
+    assert rows == [
+        ("new", 20, 60, "src", "a.py", 2, 0, 0, 2),
+        ("new", 20, 60, "tests", "t.py", 4, 0, 0, 4),
+        ("old", 10, -300, "src", "a.py", 1, 0, 0, 1),
+    ]
+
+
+def test_opening_with_another_scope_forgets_recorded_commits(tmp_path: Path) -> None:
+    """Commits analysed with one scope are kept for it, and dropped for another."""
+    db_path = tmp_path / "history.sqlite"
+    with HistoryStore(db_path, scope="src") as store:
+        store.add_commits([("aaa", [("src", "a.py", 3, 1, 1, 5)])])
+
+    with HistoryStore(db_path, scope="src") as store:
+        assert store.analysed_commit_ids() == {"aaa"}
+    with HistoryStore(db_path) as store:
+        assert store.analysed_commit_ids() == {"aaa"}
+    with HistoryStore(db_path, scope="tests") as store:
+        assert store.analysed_commit_ids() == set()
@@ -0,0 +1,63 @@
+"""Tests for profiling module."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from plot_py_repo import profiling
+
+
+@pytest.fixture(autouse=True)
+def _recording() -> Iterator[None]:
+    """Record during each test and leave recording off afterwards."""
+    profiling.enable()
+    yield
+    profiling.disable()
+
+
+def test_summary_reports_stage_calls_bytes_and_hit_ratio() -> None:
+    """Stages accumulate calls and bytes; hits/misses counters pair into a ratio."""
+    for _ in range(3):
+        with profiling.stage("git.blob_read"):
+            profiling.add_bytes("git.blob_read", 1_000_000)
+    profiling.count("blob_cache.hits", 3)
+    profiling.count("blob_cache.misses")
+
+    summary = profiling.summary()
+    stage_row = next(line for line in summary.splitlines() if "git.blob_read" in line)
+
+    assert stage_row.split()[1] == "3"
+    assert stage_row.split()[4] == "3.00"
+    assert "blob_cache hit ratio" in summary
+    assert "75.0%" in summary
+
+
+def test_write_trace_emits_chrome_trace_events(tmp_path: Path) -> None:
+    """The trace holds one complete ("X") event per stage call plus counter events."""
+    with profiling.stage("classify"):
+        pass
+    profiling.count("classify.files", 5)
+    trace_path = tmp_path / "trace.json"
+
+    profiling.write_trace(trace_path)
+    events = json.loads(trace_path.read_text())["traceEvents"]
+
+    assert [(e["name"], e["ph"]) for e in events] == [
+        ("classify", "X"),
+        ("classify.files", "C"),
+    ]
+    assert events[0]["dur"] >= 0
+    assert events[1]["args"] == {"value": 5}
+
+
+def test_disabled_recording_keeps_nothing() -> None:
+    """With recording off, stages and counters are no-ops."""
+    profiling.disable()
+    with profiling.stage("git.log"):
+        profiling.add_bytes("git.log", 10)
+    profiling.count("blob_cache.hits")
+
+    assert not profiling.is_enabled()
+    assert "git.log" not in profiling.summary()
@@ -0,0 +1,79 @@
+"""Tests for sampling module."""
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from plot_py_repo.sampling import sample_commits
+
+
+def _commit(commit_hash: str, local_time: str) -> tuple[str, int, int]:
+    """Build (commit_hash, commit_time, utc_offset) from an ISO local time."""
+    moment = datetime.fromisoformat(local_time)
+    utc_offset = moment.utcoffset()
+    assert utc_offset is not None
+    return commit_hash, int(moment.timestamp()), int(utc_offset.total_seconds()) // 60
+
+
+COMMITS = [
+    _commit("a1", "2024-01-01 09:00:00+00:00"),
+    _commit("a2", "2024-01-01 17:00:00+00:00"),
+    _commit("b1", "2024-01-03 10:00:00+00:00"),
+    _commit("c1", "2024-01-08 10:00:00+00:00"),
+    _commit("c2", "2024-01-09 10:00:00+00:00"),
+    _commit("d1", "2024-02-01 10:00:00+00:00"),
+    _commit("d2", "2024-02-02 10:00:00+00:00"),
+]
+
+
+def _hashes(commits: Iterable[tuple[str, int, int]]) -> list[str]:
+    return [commit_hash for commit_hash, _, _ in commits]
+
+
+def test_per_period_keeps_latest_commit_of_each_period() -> None:
+    """Day, ISO week and month buckets each keep their last commit."""
+    assert _hashes(sample_commits(COMMITS, per="day")) == [
+        "a2",
+        "b1",
+        "c1",
+        "c2",
+        "d1",
+        "d2",
+    ]
+    assert _hashes(sample_commits(COMMITS, per="week")) == ["b1", "c2", "d2"]
+    assert _hashes(sample_commits(COMMITS, per="month")) == ["c2", "d2"]
+
+
+def test_periods_follow_each_commits_local_date() -> None:
+    """A late-evening commit belongs to its author's day, not the UTC one."""
+    commits = [
+        _commit("late", "2024-01-01 23:30:00-05:00"),  # 04:30 on 2 January UTC
+        _commit("next", "2024-01-02 09:00:00-05:00"),
+    ]
+
+    assert _hashes(sample_commits(commits, per="day")) == ["late", "next"]
+
+
+def test_per_period_keeps_one_commit_when_dates_run_out_of_order() -> None:
+    """A period's commits need not be adjacent in the log; the last one logged wins."""
+    commits = [
+        _commit("jan", "2024-01-05 10:00:00+00:00"),
+        _commit("feb", "2024-02-05 10:00:00+00:00"),
+        _commit("rebased", "2024-01-20 10:00:00+00:00"),
+        _commit("newest", "2024-02-01 10:00:00+00:00"),
+    ]
+
+    assert _hashes(sample_commits(commits, per="month")) == ["rebased", "newest"]
+
+
+def test_every_and_max_commits_always_keep_newest() -> None:
+    """Strided sampling includes the newest commit, and max_commits is a hard cap."""
+    assert _hashes(sample_commits(COMMITS, every=3)) == ["a1", "c1", "d2"]
+    assert _hashes(sample_commits(COMMITS, every=4)) == ["a1", "c2", "d2"]
+    assert _hashes(sample_commits(COMMITS, max_commits=3)) == ["a1", "c1", "d2"]
+    assert _hashes(sample_commits(COMMITS, max_commits=100)) == _hashes(COMMITS)
+
+
+def test_no_sampling_passes_everything_through() -> None:
+    """Default options keep every commit, and an empty history stays empty."""
+    assert list(sample_commits(COMMITS)) == COMMITS
+    assert list(sample_commits([], per="week", every=2, max_commits=1)) == []
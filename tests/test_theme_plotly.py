@@ -1,10 +1,14 @@
 """Tests for theme module."""
 
+from pathlib import Path
+
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.io as pio
+import pytest
 
 from plot_py_repo.theme_plotly import (
+    ChartExporter,
     _format_date,
     add_footnote_annotation,
     apply_common_layout,
@@ -48,3 +52,35 @@ def test_add_footer_adds_annotation_with_text() -> None:
     assert "All lines counted (as in IDE)" in footer_text
 
     assert result is fig
+
+
+@pytest.mark.slow
+def test_chart_exporter_writes_every_submitted_figure(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """One ChartExporter session writes an image per submitted figure.
+
+    Images are reported as created only once written, when the exporter closes.
+    """
+    output_paths = [tmp_path / f"chart_{i}.webp" for i in range(3)]
+
+    with ChartExporter() as exporter:
+        for i, output_path in enumerate(output_paths):
+            exporter.submit(apply_common_layout(go.Figure(go.Bar(y=[i, 1]))), output_path)
+        assert "Created" not in capsys.readouterr().out
+
+    assert all(output_path.stat().st_size > 0 for output_path in output_paths)
+    assert capsys.readouterr().out.splitlines() == [
+        f"✅  Created {output_path}" for output_path in output_paths
+    ]
+
+
+def test_chart_exporter_does_not_mask_errors_raised_in_its_block() -> None:
+    """An error leaving the with block wins over any export (or browser) error."""
+
+    def load_rows() -> None:
+        msg = "no rows"
+        raise ValueError(msg)
+
+    with pytest.raises(ValueError, match="no rows"), ChartExporter():
+        load_rows()
@@ -1,10 +1,19 @@
 """Tests for visualise module."""
 
+import os
 from pathlib import Path
 
 import pandas as pd
+import pytest
 
-from plot_py_repo.visualise import _exclude_filenames, _load_csv
+from plot_py_repo import visualise
+from plot_py_repo.visualise import (
+    _exclude_filenames,
+    _load_csv,
+    _load_history,
+    _reduce_history,
+    _summary_path,
+)
 
 
 def test_load_csv_loads_dataframe(tmp_path: Path) -> None:
@@ -29,6 +38,97 @@ def test_load_csv_loads_dataframe(tmp_path: Path) -> None:
     assert result["total_lines"].dtype == "int64"
 
 
+@pytest.mark.parametrize(
+    "commit_dates",
+    [
+        ["2025-10-06 12:00:00 +0200", "2025-10-07 12:00:00 +0100"],
+        ["2025-10-06T12:00:00+02:00", "2025-10-07T12:00:00+01:00"],
+    ],
+    ids=["git", "iso"],
+)
+def test_load_csv_converts_mixed_utc_offsets_to_utc(
+    tmp_path: Path, commit_dates: list[str]
+) -> None:
+    """Mixed offsets share one tz-aware column in UTC, as in columnar files."""
+    csv_path = tmp_path / "test_history.csv"
+    pd.DataFrame({"commit_date": commit_dates}).to_csv(csv_path, index=False)
+
+    result = _load_csv(str(csv_path))
+
+    assert str(result["commit_date"].dt.tz) == "UTC"
+    assert result["commit_date"].dt.hour.tolist() == [10, 11]
+
+
+def test_compact_load_holds_the_same_history_in_narrow_types(tmp_path: Path) -> None:
+    """Compact loads give the plain load's values as categoricals and int32 counts."""
+    csv_path = tmp_path / "test_history.csv"
+    pd.DataFrame(
+        {
+            "repo_name": ["test-repo"] * 3,
+            "commit_date": ["2025-10-07 12:00:00 +0200"]
+            + ["2025-10-06 12:00:00 +0200"] * 2,
+            "commit_id": ["bbb", "aaa", "aaa"],
+            "filedir": ["src", "src", "tests"],
+            "filename": ["a.py", "a.py", "test_a.py"],
+            "code_lines": [10, 20, 70_000],
+            "total_lines": [15, 25, 70_001],
+        }
+    ).to_csv(csv_path, index=False)
+
+    plain = _load_csv(str(csv_path))
+    compact = _load_csv(str(csv_path), compact=True)
+
+    assert isinstance(compact["commit_id"].dtype, pd.CategoricalDtype)
+    assert compact["commit_id"].cat.categories.tolist() == ["aaa", "bbb"]
+    assert isinstance(compact["filename"].dtype, pd.CategoricalDtype)
+    assert compact["code_lines"].dtype == "int32"
+    pd.testing.assert_frame_equal(
+        compact.astype({column: plain[column].dtype for column in plain}), plain
+    )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_reduce_history_streams_totals_and_latest_rows(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, suffix: str
+) -> None:
+    """Chunks reduce to per-commit filedir totals and the latest commit's files."""
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    history_path = tmp_path / f"repo_history{suffix}"
+    history = pd.DataFrame(
+        {
+            "repo_name": ["test-repo"] * 5,
+            "commit_date": ["2025-10-06 12:00:00 +0200"] * 3
+            + ["2025-10-07 12:00:00 +0200"] * 2,
+            "commit_id": ["aaa", "aaa", "aaa", "bbb", "bbb"],
+            "filedir": ["src", "tests", "src", "src", "src"],
+            "filename": ["a.py", "t.py", "__init__.py", "a.py", "b.py"],
+            "code_lines": [10, 5, 1, 12, 3],
+            "documentation_lines": [2, 0, 0, 2, 1],
+        }
+    )
+    if suffix == ".csv":
+        history.to_csv(history_path, index=False)
+    else:
+        history["commit_date"] = pd.to_datetime(history["commit_date"])
+        history.to_parquet(history_path, index=False)
+    monkeypatch.setattr(visualise, "_CHUNK_ROWS", 2)  # Commits span chunks
+
+    totals, latest = _reduce_history(str(history_path))
+
+    assert {
+        (commit_id, filedir): (code_lines, documentation_lines)
+        for commit_id, filedir, code_lines, documentation_lines in totals[
+            ["commit_id", "filedir", "code_lines", "documentation_lines"]
+        ].itertuples(index=False)
+    } == {("aaa", "src"): (10, 2), ("aaa", "tests"): (5, 0), ("bbb", "src"): (15, 3)}
+    assert latest["filename"].tolist() == ["a.py", "b.py"]
+    loaded_dates = _load_history(str(history_path))["commit_date"]
+    assert (
+        totals["commit_date"].dtype == latest["commit_date"].dtype == loaded_dates.dtype
+    )
+
+
 def test_exclude_filenames_single() -> None:
     """Removes rows matching single filename."""
     df = pd.DataFrame({"filename": ["module.py", "__init__.py", "test_example.py"]})
@@ -74,3 +174,18 @@ def test_exclude_filenames_nonexistent_filename_returns_all_rows() -> None:
 
     assert len(result) == len(df)
     assert list(result["filename"]) == ["module.py", "main.py"]
+
+
+def test_summary_path_pairs_history_with_up_to_date_summary(tmp_path: Path) -> None:
+    """repo_history.X pairs with repo_summary.X, unless the summary is stale."""
+    history_path = tmp_path / "repo_history.csv"
+    summary_path = tmp_path / "repo_summary.csv"
+    history_path.write_text("")
+    assert _summary_path(str(history_path)) is None
+
+    summary_path.write_text("")
+    assert _summary_path(str(history_path)) == summary_path
+
+    os.utime(summary_path, (0, 0))  # Older than the history file
+    assert _summary_path(str(history_path)) is None
+    assert _summary_path(str(tmp_path / "other.csv")) is None